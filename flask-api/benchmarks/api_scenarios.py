@@ -0,0 +1,243 @@
+"""Timed scenarios for the hot API paths against a production-sized dataset.
+
+Load a dataset with project.seed.data_seed (or pass --generate), then run the
+scenarios in-process through the Flask test client with a locally minted
+admin token. Celery, the scheduler and the outbox kick are disabled, so mail
+and push only reach the outbox table.
+
+    python -m project.seed.data_seed --url sqlite:////tmp/bench.db
+    python benchmarks/api_scenarios.py --url sqlite:////tmp/bench.db --output before.json
+    python benchmarks/api_scenarios.py --url sqlite:////tmp/bench.db --compare before.json
+
+Each scenario draws its parameters from a generator seeded with its own name,
+so two runs against the same dataset issue the same requests. booking_create
+and reminder_tick write rows; regenerate the dataset when runs must match
+exactly. --cold clears the in-process caches before every request.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+for key, value in (('CELERY_BROKER_URL', ''), ('SCHEDULER_AUTOSTART', 'false'), ('OUTBOX_KICK', 'false'),
+                   ('JWT_SECRET_KEY', 'benchmark-secret-key-long-enough-for-hs256'),
+                   ('TOKEN_EXPIRATION_DAYS', '1')):
+    os.environ.setdefault(key, value)
+
+from sqlalchemy import create_engine, event, func, select  # noqa: E402
+from project import create_app, db  # noqa: E402
+from project.config import BaseConfig  # noqa: E402
+from project.models import Booking, BookingUser, Room, User  # noqa: E402
+from project.seed import data_seed  # noqa: E402
+from project.services.login_service import AuthService  # noqa: E402
+from project.services.reminder_engine import ReminderEngine  # noqa: E402
+from project.testing import clear_caches  # noqa: E402
+
+DATE_FORMAT = '%Y-%m-%d'
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class Bench:
+    def __init__(self, app, counts: dict, range_days: int):
+        self.app = app
+        self.client = app.test_client()
+        self.counts = counts
+        self.range_days = range_days
+        self.now = datetime.now().replace(microsecond=0)
+        token = AuthService.login_user(db.session.get(User, 1))[0]["token"]
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def request(self, method: str, path: str, json_body=None) -> int:
+        response = self.client.open(path, method=method, json=json_body, headers=self.headers)
+        response.get_data()
+        response.close()
+        return response.status_code
+
+
+def calendar_range(bench: Bench, rng: random.Random) -> int:
+    start = bench.now + timedelta(days=rng.randint(-30, 30))
+    end = start + timedelta(days=bench.range_days)
+    return bench.request('GET', f'/v1/bookings?start_date={start:{DATE_FORMAT}}&end_date={end:{DATE_FORMAT}}')
+
+
+def status_rooms(bench: Bench, rng: random.Random) -> int:
+    return bench.request('GET', '/v1/status_rooms')
+
+
+def booking_create(bench: Bench, rng: random.Random) -> int:
+    # random slots, so every request runs the conflict check against a populated room calendar
+    start = (bench.now + timedelta(days=rng.randint(1, 60))).replace(hour=rng.randint(8, 17), minute=0, second=0)
+    users = bench.counts['user']
+    return bench.request('POST', '/v1/bookings', {
+        'room_id': rng.randint(1, bench.counts['room']),
+        'title': 'Benchmark meeting',
+        'time_start': start.strftime(TIME_FORMAT),
+        'time_end': (start + timedelta(minutes=30)).strftime(TIME_FORMAT),
+        'user_ids': rng.sample(range(1, users + 1), min(5, users)),
+    })
+
+
+def user_search(bench: Bench, rng: random.Random) -> int:
+    return bench.request('GET', f'/v1/users/search?search=User {rng.randint(1, 999)}')
+
+
+def reminder_tick(bench: Bench, rng: random.Random) -> int:
+    # force the window reload every run; it is the query-heavy part of a tick
+    ReminderEngine._loaded_until = None
+    ReminderEngine.tick()
+    return 200
+
+
+SCENARIOS = {
+    'calendar_range': calendar_range,
+    'status_rooms': status_rooms,
+    'booking_create': booking_create,
+    'user_search': user_search,
+    'reminder_tick': reminder_tick,
+}
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_scenario(bench: Bench, name: str, runs: int, warmup: int, cold: bool) -> dict:
+    scenario = SCENARIOS[name]
+    rng = random.Random(name)
+    queries = []
+
+    def count(*args):
+        queries[-1] += 1
+
+    timings, statuses = [], {}
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        for index in range(warmup + runs):
+            if cold:
+                clear_caches()
+            queries.append(0)
+            started = time.perf_counter()
+            status = scenario(bench, rng)
+            elapsed = (time.perf_counter() - started) * 1000
+            db.session.remove()
+            if index >= warmup:
+                timings.append(elapsed)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    return {
+        'runs': runs,
+        'p50_ms': statistics.median(timings),
+        'p95_ms': percentile(timings, 0.95),
+        'max_ms': max(timings),
+        'mean_ms': statistics.fmean(timings),
+        'queries_p50': statistics.median(queries[warmup:]),
+        'statuses': statuses,
+    }
+
+
+def table_counts() -> dict:
+    return {name: db.session.execute(select(func.count()).select_from(model)).scalar()
+            for name, model in (('user', User), ('room', Room), ('booking', Booking),
+                                ('booking_user', BookingUser))}
+
+
+def add_dataset_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--url', default='sqlite:////tmp/bench.db')
+    parser.add_argument('--generate', action='store_true', help='drop and regenerate the dataset first')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--rooms', type=int, default=500)
+    parser.add_argument('--bookings', type=int, default=1000000)
+    parser.add_argument('--attendees', type=int, default=5)
+    parser.add_argument('--force', '--yes', action='store_true',
+                        help='allow --generate to drop a non-SQLite database')
+
+
+def generate_dataset(args: argparse.Namespace) -> None:
+    data_seed.confirm_scratch_database(args.url, args.force)
+    engine = create_engine(args.url)
+    data_seed._fast_load(engine)
+    data_seed.generate(engine, args.users, args.rooms, args.bookings, args.attendees)
+    engine.dispose()
+
+
+def bench_app(url: str):
+    class BenchConfig(BaseConfig):
+        SQLALCHEMY_DATABASE_URI = url
+        SQLALCHEMY_REPLICA_URIS = []
+        SCHEDULER_API_ENABLED = False
+        SCHEDULER_AUTOSTART = False
+
+    return create_app(BenchConfig)
+
+
+def print_report(report: dict, baseline: dict = None) -> None:
+    print(', '.join(f'{name}={count}' for name, count in report['dataset'].items()),
+          f"| {report['dialect']} | {'cold' if report['cold'] else 'warm'} caches")
+    header = f"{'scenario':16} {'p50':>9} {'p95':>9} {'max':>9} {'queries':>8}  statuses"
+    if baseline:
+        header += f"{'':12} p50 vs baseline"
+    print(header)
+    for name, result in report['scenarios'].items():
+        line = (f"{name:16} {result['p50_ms']:7.1f}ms {result['p95_ms']:7.1f}ms {result['max_ms']:7.1f}ms "
+                f"{result['queries_p50']:8g}  {json.dumps(result['statuses']):20}")
+        previous = (baseline or {}).get('scenarios', {}).get(name)
+        if previous:
+            change = (result['p50_ms'] - previous['p50_ms']) / previous['p50_ms'] * 100
+            line += f" {previous['p50_ms']:7.1f}ms {change:+6.1f}%"
+        print(line)
+    if baseline and baseline['dataset'] != report['dataset']:
+        print('warning: baseline was taken on a different dataset', baseline['dataset'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='run only these scenarios (repeatable)')
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--range-days', type=int, default=1, help='width of the calendar_range window')
+    parser.add_argument('--cold', action='store_true', help='clear in-process caches before every request')
+    parser.add_argument('--output', help='write the report as JSON')
+    parser.add_argument('--compare', help='JSON report of an earlier run')
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_dataset(args)
+    app = bench_app(args.url)
+    with app.app_context():
+        counts = table_counts()
+        bench = Bench(app, counts, args.range_days)
+        report = {
+            'started_at': bench.now.isoformat(),
+            'dialect': db.engine.dialect.name,
+            'python': platform.python_version(),
+            'dataset': counts,
+            'cold': args.cold,
+            'runs': args.runs,
+            'scenarios': {name: run_scenario(bench, name, args.runs, args.warmup, args.cold)
+                          for name in (args.scenario or SCENARIOS)},
+        }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+"""Concurrent mixed traffic against the blueprint routes.
+
+The app is served by a threaded werkzeug server inside this process and
+driven over HTTP by virtual users, each a thread that picks weighted actions
+from a traffic mix until the duration is up. Access tokens are minted up
+front with AuthService, so only the login action pays for bcrypt. SMTP and
+FCM are replaced by stubs with a fixed latency, while the outbox still drains
+through the fallback task threads.
+
+Expects a dataset from project.seed.data_seed (or pass --generate):
+
+    python -m project.seed.data_seed --url sqlite:////tmp/bench.db --bookings 100000
+    python benchmarks/load_test.py --url sqlite:////tmp/bench.db --mix mixed --vus 20 --duration 30
+    python benchmarks/load_test.py --url sqlite:////tmp/bench.db --mix morning_burst --vus 50 --duration 10
+
+--target sends the traffic to a server that is already running instead; its
+JWT_SECRET_KEY must match this process's, and the stubs do not apply there.
+Errors are transport failures and 5xx responses; 4xx responses (booking
+conflicts, validation) are counted separately as rejected.
+"""
+import argparse
+import json
+import logging
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+# api_scenarios prepares sys.path and the environment before project is imported
+from api_scenarios import add_dataset_arguments, bench_app, generate_dataset, percentile, table_counts
+from werkzeug.serving import make_server
+from project import db
+from project.models import User
+from project.seed import data_seed
+from project.services.login_service import AuthService
+from project.services.mail_transport import MailTransport
+from project.services.metrics import Metrics
+from project.services.notification_service import PushNotification
+
+DATE_FORMAT = '%Y-%m-%d'
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# action name -> weight
+MIXES = {
+    'mixed': {'calendar': 40, 'admin_calendar': 10, 'status_rooms': 20, 'invites': 10,
+              'book': 10, 'user_search': 5, 'login': 5},
+    'calendar': {'calendar': 60, 'admin_calendar': 20, 'status_rooms': 20},
+    'morning_burst': {'book_9am': 70, 'status_rooms': 20, 'calendar': 10},
+    'login_storm': {'login': 90, 'calendar': 10},
+}
+
+
+class StubFCM:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def send_many(self, tokens, message_title, message_body):
+        time.sleep(self.latency)
+        return {token: {'message_id': f'stub-{token}'} for token in tokens}
+
+
+def install_stubs(mail_latency: float, fcm_latency: float) -> None:
+    def send_many(messages):
+        with Metrics.time_external('smtp'):
+            time.sleep(mail_latency * len(messages))
+        return []
+    MailTransport.send_many = staticmethod(send_many)
+    PushNotification._push_service = StubFCM(fcm_latency)
+
+
+class VirtualUser:
+    def __init__(self, base_url: str, user_id: int, token: str, counts: Dict[str, int], rng: random.Random):
+        self.base_url = base_url
+        self.user_id = user_id
+        self.headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+        self.counts = counts
+        self.rng = rng
+        self.today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def request(self, method: str, path: str, body: Optional[dict] = None, auth: bool = True) -> int:
+        data = json.dumps(body).encode() if body is not None else None
+        headers = self.headers if auth else {'Content-Type': 'application/json'}
+        request = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+    def date_range(self) -> str:
+        start = self.today + timedelta(days=self.rng.randint(-7, 7))
+        return f'start_date={start:{DATE_FORMAT}}&end_date={start + timedelta(days=7):{DATE_FORMAT}}'
+
+    def booking(self, start: datetime, room_id: int) -> dict:
+        users = self.counts['user']
+        return {'room_id': room_id, 'title': 'Load test meeting',
+                'time_start': start.strftime(TIME_FORMAT),
+                'time_end': (start + timedelta(minutes=30)).strftime(TIME_FORMAT),
+                'user_ids': self.rng.sample(range(1, users + 1), min(3, users))}
+
+
+def calendar(user: VirtualUser) -> int:
+    return user.request('GET', f'/v1/user/bookings?{user.date_range()}')
+
+
+def admin_calendar(user: VirtualUser) -> int:
+    return user.request('GET', f'/v1/bookings?{user.date_range()}')
+
+
+def status_rooms(user: VirtualUser) -> int:
+    return user.request('GET', '/v1/status_rooms')
+
+
+def invites(user: VirtualUser) -> int:
+    return user.request('GET', '/v1/user/view_list_invite')
+
+
+def book(user: VirtualUser) -> int:
+    start = user.today + timedelta(days=user.rng.randint(1, 60), hours=user.rng.randint(8, 17))
+    return user.request('POST', '/v1/user/bookings', user.booking(start, user.rng.randint(1, user.counts['room'])))
+
+
+def book_9am(user: VirtualUser) -> int:
+    # everyone wants tomorrow morning in one of the first few rooms
+    start = user.today + timedelta(days=1, hours=9, minutes=30 * user.rng.randint(0, 3))
+    room_id = user.rng.randint(1, min(10, user.counts['room']))
+    return user.request('POST', '/v1/user/bookings', user.booking(start, room_id))
+
+
+def user_search(user: VirtualUser) -> int:
+    return user.request('GET', f'/v1/users/search?search=User%20{user.rng.randint(1, 999)}')
+
+
+def login(user: VirtualUser) -> int:
+    return user.request('POST', '/v1/login', {
+        'email': data_seed.user_email(user.user_id), 'password': data_seed.PASSWORD,
+        'fcm_token': f'bench-token-{user.user_id}'}, auth=False)
+
+
+ACTIONS: Dict[str, Callable[[VirtualUser], int]] = {
+    'calendar': calendar,
+    'admin_calendar': admin_calendar,
+    'status_rooms': status_rooms,
+    'invites': invites,
+    'book': book,
+    'book_9am': book_9am,
+    'user_search': user_search,
+    'login': login,
+}
+
+# admin-facing routes run with the admin token (user 1 in the generated dataset)
+ADMIN_ACTIONS = ('admin_calendar', 'user_search')
+
+
+class Results:
+    def __init__(self):
+        self.samples: Dict[str, List[Tuple[float, int]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, action: str, seconds: float, status: int) -> None:
+        with self._lock:
+            self.samples.setdefault(action, []).append((seconds, status))
+
+    @staticmethod
+    def summarize(samples: List[Tuple[float, int]], duration: float) -> dict:
+        latencies = [seconds * 1000 for seconds, _ in samples]
+        errors = sum(1 for _, status in samples if status == 0 or status >= 500)
+        rejected = sum(1 for _, status in samples if 400 <= status < 500)
+        return {
+            'requests': len(samples),
+            'rps': len(samples) / duration,
+            'p50_ms': statistics.median(latencies),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+            'error_rate': errors / len(samples),
+            'rejected_rate': rejected / len(samples),
+        }
+
+    def report(self, duration: float) -> Dict[str, dict]:
+        with self._lock:
+            samples = {action: list(values) for action, values in self.samples.items()}
+        report = {action: self.summarize(values, duration) for action, values in sorted(samples.items())}
+        everything = [sample for values in samples.values() for sample in values]
+        if everything:
+            report['total'] = self.summarize(everything, duration)
+        return report
+
+
+def run_user(user: VirtualUser, mix: Dict[str, int], admin: VirtualUser, results: Results,
+             deadline: float, think: float) -> None:
+    actions, weights = list(mix), list(mix.values())
+    while time.monotonic() < deadline:
+        action = user.rng.choices(actions, weights)[0]
+        actor = admin if action in ADMIN_ACTIONS else user
+        started = time.perf_counter()
+        try:
+            status = ACTIONS[action](actor)
+        except (OSError, urllib.error.URLError):
+            status = 0
+        results.record(action, time.perf_counter() - started, status)
+        if think:
+            time.sleep(user.rng.uniform(0, 2 * think))
+
+
+def mint_tokens(user_ids: List[int]) -> Dict[int, str]:
+    return {user_id: AuthService.login_user(db.session.get(User, user_id))[0]["token"] for user_id in user_ids}
+
+
+def print_report(report: Dict[str, dict], mix: str, vus: int, duration: float) -> None:
+    print(f'mix={mix} vus={vus} duration={duration:.1f}s')
+    print(f"{'action':16} {'requests':>9} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7} {'4xx':>7}")
+    for action, result in report.items():
+        print(f"{action:16} {result['requests']:9d} {result['rps']:8.1f} {result['p50_ms']:7.1f}ms "
+              f"{result['p95_ms']:7.1f}ms {result['p99_ms']:7.1f}ms {result['error_rate']:7.1%} "
+              f"{result['rejected_rate']:7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_dataset_arguments(parser)
+    parser.add_argument('--mix', choices=sorted(MIXES), default='mixed')
+    parser.add_argument('--vus', type=int, default=20, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds of traffic')
+    parser.add_argument('--ramp', type=float, default=None,
+                        help='seconds over which virtual users start; default 0 for morning_burst, else 5')
+    parser.add_argument('--think', type=float, default=0.0, help='mean pause between requests, in seconds')
+    parser.add_argument('--mail-latency', type=float, default=0.05, help='stub SMTP seconds per message')
+    parser.add_argument('--fcm-latency', type=float, default=0.1, help='stub FCM seconds per push')
+    parser.add_argument('--target', help='base URL of a running server, e.g. http://127.0.0.1:5000')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the report as JSON')
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_dataset(args)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    app = bench_app(args.url)
+    rng = random.Random(args.seed)
+    with app.app_context():
+        counts = table_counts()
+        user_ids = [1] + rng.sample(range(2, counts['user'] + 1), min(args.vus, counts['user'] - 1))
+        tokens = mint_tokens(user_ids)
+        db.session.remove()
+
+    server = None
+    base_url = args.target
+    if base_url is None:
+        install_stubs(args.mail_latency, args.fcm_latency)
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+
+    admin = VirtualUser(base_url, 1, tokens[1], counts, random.Random(f'{args.seed}-admin'))
+    members = [VirtualUser(base_url, user_id, tokens[user_id], counts, random.Random(f'{args.seed}-{user_id}'))
+               for user_id in user_ids[1:]]
+    ramp = args.ramp if args.ramp is not None else (0.0 if args.mix == 'morning_burst' else 5.0)
+    results = Results()
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = []
+    for index, member in enumerate(members):
+        delay = ramp * index / len(members)
+        thread = threading.Timer(delay, run_user, (member, MIXES[args.mix], admin, results, deadline, args.think))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    duration = time.monotonic() - started
+    if server is not None:
+        server.shutdown()
+
+    report = results.report(duration)
+    print_report(report, args.mix, len(members), duration)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'mix': args.mix, 'vus': len(members), 'duration': duration, 'dataset': counts,
+                       'actions': report}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+from project import celery, create_app
+
+app = create_app()
+app.app_context().push()
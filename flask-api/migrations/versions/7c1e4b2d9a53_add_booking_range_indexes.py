@@ -0,0 +1,40 @@
+"""add booking range indexes
+
+Revision ID: 7c1e4b2d9a53
+Revises: 3f6d2a9c4e10
+Create Date: 2026-10-18 10:03:17.502911
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e4b2d9a53'
+down_revision = '3f6d2a9c4e10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('booking', schema=None) as batch_op:
+        batch_op.create_index('ix_booking_room_active_time', ['room_id', 'is_deleted', 'time_start', 'time_end'], unique=False)
+        batch_op.create_index('ix_booking_active_time_end', ['is_deleted', 'time_end'], unique=False)
+        batch_op.create_index('ix_booking_active_time_start', ['is_deleted', 'time_start'], unique=False)
+        batch_op.create_index('ix_booking_creator', ['creator_id', 'booking_id'], unique=False)
+        batch_op.create_index('ix_booking_pending', ['is_accepted', 'is_deleted', 'booking_id'], unique=False)
+
+    with op.batch_alter_table('booking_user', schema=None) as batch_op:
+        batch_op.create_index('ix_booking_user_user_booking', ['user_id', 'booking_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('booking_user', schema=None) as batch_op:
+        batch_op.drop_index('ix_booking_user_user_booking')
+
+    with op.batch_alter_table('booking', schema=None) as batch_op:
+        batch_op.drop_index('ix_booking_pending')
+        batch_op.drop_index('ix_booking_creator')
+        batch_op.drop_index('ix_booking_active_time_start')
+        batch_op.drop_index('ix_booking_active_time_end')
+        batch_op.drop_index('ix_booking_room_active_time')
@@ -0,0 +1,38 @@
+"""create table reminder_sent_log
+
+Revision ID: c2d8e5f1a7b3
+Revises: 9a4f0c6e2b71
+Create Date: 2026-10-18 15:48:52.271903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2d8e5f1a7b3'
+down_revision = '9a4f0c6e2b71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reminder_sent_log',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=False),
+    sa.Column('lead_minutes', sa.Integer(), nullable=False),
+    sa.Column('time_start', sa.DateTime(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['booking_id'], ['booking.booking_id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('booking_id', 'lead_minutes', 'time_start', name='uq_reminder_sent_log_booking_lead_start')
+    )
+    with op.batch_alter_table('reminder_sent_log', schema=None) as batch_op:
+        batch_op.create_index('ix_reminder_sent_log_time_start', ['time_start'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reminder_sent_log', schema=None) as batch_op:
+        batch_op.drop_index('ix_reminder_sent_log_time_start')
+
+    op.drop_table('reminder_sent_log')
@@ -0,0 +1,26 @@
+"""add index fcm_token in user
+
+Revision ID: d7b3a1e9f4c2
+Revises: c2d8e5f1a7b3
+Create Date: 2026-10-18 16:14:37.905218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7b3a1e9f4c2'
+down_revision = 'c2d8e5f1a7b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_fcm_token'), ['fcm_token'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_fcm_token'))
@@ -1,66 +1,77 @@
-import os
-from flask import Flask, request
+from flask import Flask
 from project.config import BaseConfig
+from project.database.pool import engine_options
+from project.database.routing import ReplicaRouter, RoutingSession, replica_bind_keys
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_mail import Mail
-from celery import Celery, shared_task
-from pyfcm import FCMNotification
-import firebase_admin
-from firebase_admin import credentials
-from firebase_admin import messaging
+from celery import Celery
 from flask_apscheduler import APScheduler
 
-app=Flask(__name__)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+migrate = Migrate()
+jwt = JWTManager()
+mail = Mail()
+celery = Celery(__name__)
+scheduler = APScheduler()
 
-CORS(app, supports_credentials=True)
 
-app.config['SQLALCHEMY_DATABASE_URI'] = BaseConfig.SQLALCHEMY_DATABASE_URI
-app.config['JWT_SECRET_KEY'] = BaseConfig.JWT_SECRET_KEY
-app.config['MAIL_SERVER'] = BaseConfig.MAIL_SERVER
-app.config['MAIL_PORT'] = BaseConfig.MAIL_PORT
-app.config['MAIL_USERNAME'] = BaseConfig.MAIL_USERNAME
-app.config['MAIL_PASSWORD'] = BaseConfig.MAIL_PASSWORD
-app.config['MAIL_USE_TLS'] = BaseConfig.MAIL_USE_TLS
-app.config['MAIL_USE_SSL'] = BaseConfig.MAIL_USE_SSL
-app.config['MAIL_DEFAULT_SENDER'] = BaseConfig.MAIL_DEFAULT_SENDER
-app.config['SCHEDULER_API_ENABLED'] = BaseConfig.SCHEDULER_API_ENABLED
-app.config['CELERY_BROKER_URL'] = 'redis://localhost:6379/0'
-app.config['CELERY_RESULT_BACKEND'] = 'redis://localhost:6379/0'
+def create_app(config=BaseConfig) -> Flask:
+    app = Flask(__name__)
 
-mail = Mail(app)
+    CORS(app, supports_credentials=True)
 
-cred = credentials.Certificate(BaseConfig.FIREBASE_ADMIN_SDK)
-firebase_admin.initialize_app(cred)
-push_service = FCMNotification(api_key=BaseConfig.FCM_SERVER_KEY)
+    app.config.from_object(config)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(config.SQLALCHEMY_DATABASE_URI, config)
+    app.config['SQLALCHEMY_BINDS'] = {
+        key: dict(engine_options(uri, config), url=uri)
+        for key, uri in zip(replica_bind_keys(config.SQLALCHEMY_REPLICA_URIS), config.SQLALCHEMY_REPLICA_URIS)
+    }
 
-celery = Celery(app.name, broker=app.config['CELERY_BROKER_URL'])
-celery.conf.update(app.config)
+    mail.init_app(app)
+    db.init_app(app)
+    migrate.init_app(app, db)
+    jwt.init_app(app)
 
-scheduler =  APScheduler()
-scheduler.init_app(app)
-scheduler.start()
+    celery.conf.update(broker_url=config.CELERY_BROKER_URL, result_backend=config.CELERY_RESULT_BACKEND)
 
-
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
-jwt = JWTManager(app)
-with app.app_context():
     from project import models
-    db.create_all()
-   
-from project.api.v1.login_controller import login_blueprint
-from project.api.v1.user_controller import user_blueprint
-from project.api.v1.room_controller import room_blueprint
-from project.api.v1.booking_controller import booking_blueprint
+    from project.api.v1.login_controller import login_blueprint
+    from project.api.v1.user_controller import user_blueprint
+    from project.api.v1.room_controller import room_blueprint
+    from project.api.v1.booking_controller import booking_blueprint
+    from project.api.v1.metrics_controller import metrics_blueprint
+    from project.services.metrics import Metrics
+    from project.cache.booking_interval_index import BookingIntervalIndex
+    from project.cache.count_cache import CountCache
+    from project.cache.permission_cache import PermissionCache
+    from project.cache.room_status_cache import RoomStatusCache
+
+    app.register_blueprint(login_blueprint, url_prefix='/v1')
+    app.register_blueprint(user_blueprint, url_prefix='/v1')
+    app.register_blueprint(room_blueprint, url_prefix='/v1')
+    app.register_blueprint(booking_blueprint, url_prefix='/v1')
+    app.register_blueprint(metrics_blueprint)
+    Metrics.init_app(app)
+    for cache in (PermissionCache, RoomStatusCache, CountCache, BookingIntervalIndex, ReplicaRouter):
+        cache.init_app(app)
+
+    from project.api.common.base_response import BaseResponse
+    from werkzeug.exceptions import HTTPException
+    app.register_error_handler(HTTPException, BaseResponse.error)
+
+    # registers the scheduled jobs; they only run once the scheduler is started
+    from project.services.reminder_engine import ReminderEngine
+    from project.services.outbox_dispatcher import OutboxDispatcher
 
-app.register_blueprint(login_blueprint, url_prefix='/v1')
-app.register_blueprint(user_blueprint, url_prefix='/v1')
-app.register_blueprint(room_blueprint, url_prefix='/v1')
-app.register_blueprint(booking_blueprint, url_prefix='/v1')
+    if not scheduler.running:
+        scheduler.init_app(app)
+        for job_id, setting in (('reminder_tick', 'REMINDER_TICK_SECONDS'), ('outbox_drain', 'OUTBOX_POLL_SECONDS'),
+                                ('scheduler_heartbeat', 'SCHEDULER_HEARTBEAT_SECONDS')):
+            scheduler.scheduler.reschedule_job(job_id, trigger='interval', seconds=app.config[setting])
+        if config.SCHEDULER_AUTOSTART:
+            scheduler.start()
 
-from project.api.common.base_response import BaseResponse
-from werkzeug.exceptions import HTTPException 
-app.register_error_handler(HTTPException, BaseResponse.error)
\ No newline at end of file
+    return app
@@ -0,0 +1,21 @@
+import base64
+import json
+from typing import Optional
+from werkzeug.exceptions import BadRequest
+
+
+class Cursor:
+    @staticmethod
+    def encode(booking_id: int) -> str:
+        payload = json.dumps({"booking_id": booking_id}, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode(token: Optional[str]) -> Optional[int]:
+        if not token:
+            return None
+        try:
+            payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            return int(json.loads(payload)["booking_id"])
+        except (ValueError, KeyError, TypeError):
+            raise BadRequest("Invalid cursor.")
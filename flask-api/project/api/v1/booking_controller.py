@@ -20,6 +20,9 @@ booking_blueprint = Blueprint('booking_controller', __name__)
 @has_permission("view")
 def get_bookings() -> dict:
     try:
+        stream_format = request.args.get('stream')
+        if stream_format:
+            return BookingService.stream_bookings_in_date_range(stream_format)
         response_data: dict = BookingService.get_bookings_in_date_range()
         return BaseResponse.success(response_data)
 
@@ -128,6 +131,9 @@ def Search_booking_room(room_id: int):
 @has_permission("view")
 def get_user_bookings() -> dict:
     try:
+        stream_format = request.args.get('stream')
+        if stream_format:
+            return BookingService.stream_bookings_in_date_range_user(stream_format)
         response_data: dict = BookingService.get_bookings_in_date_range_user()
         return BaseResponse.success(response_data)
 
@@ -167,8 +173,12 @@ def user_view_list_booked() -> dict:
     try:
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 10))
-        result = BookingService.user_view_list_booked(page, per_page)
+        cursor = request.args.get('cursor')
+        with_count = request.args.get('with_count', 'false').lower() == 'true'
+        result = BookingService.user_view_list_booked(page, per_page, cursor, with_count)
         return BaseResponse.success(result)
+    except BadRequest as e:
+        return BaseResponse.error(e)
     except Exception as e:
         raise InternalServerError('Internal Server Error') from e
 
@@ -180,8 +190,12 @@ def admin_view_booking_pending() -> dict:
     try:
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 10))
-        result = BookingService.admin_view_booking_pending(page, per_page)
+        cursor = request.args.get('cursor')
+        with_count = request.args.get('with_count', 'false').lower() == 'true'
+        result = BookingService.admin_view_booking_pending(page, per_page, cursor, with_count)
         return BaseResponse.success(result)
+    except BadRequest as e:
+        return BaseResponse.error(e)
     except Exception as e:
         raise InternalServerError('Internal Server Error') from e
 
@@ -248,7 +262,9 @@ def view_list_invite() -> dict:
     try:
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 10))
-        response_data: dict = BookingService.view_list_invite(page, per_page)
+        cursor = request.args.get('cursor')
+        with_count = request.args.get('with_count', 'false').lower() == 'true'
+        response_data: dict = BookingService.view_list_invite(page, per_page, cursor, with_count)
         return BaseResponse.success(response_data)
 
     except BadRequest as e:
@@ -1,32 +1,26 @@
 from functools import wraps
-from project import db
-from project.models.user import User 
-from project.models.role import Role 
-from project.models.user_has_role import UserHasRole 
-from project.models.permission import Permission 
-from project.models.role_has_permission import RoleHasPermission 
-from flask_jwt_extended import get_jwt_identity
+from flask_jwt_extended import get_jwt_identity, get_jwt
 from werkzeug.exceptions import Unauthorized, Forbidden
-from project.database.excute.user import UserExecutor
+from project.cache.permission_cache import PermissionCache
 
 
 def has_permission(required_permission):
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            user_logged_id = get_jwt_identity()
+            user_logged_id = int(get_jwt_identity())
             if not user_logged_id:
                 raise Unauthorized()
-    
-            role_names = UserExecutor.get_role_names(user_logged_id)
-            list_perssion_name=[]
-            for role_name in role_names:
-                permissions = UserExecutor.get_permission_names(role_name)
-                for permission in permissions:
-                    if permission not in list_perssion_name:
-                        list_perssion_name.append(permission)
-     
-            if required_permission in list_perssion_name:
+
+            claims = get_jwt()
+            if 'permissions' in claims:
+                if claims.get('role_version') != PermissionCache.get_role_version(user_logged_id):
+                    raise Unauthorized("Roles have changed, please log in again.")
+                permissions = claims['permissions']
+            else:
+                permissions = PermissionCache.get_permissions(user_logged_id)
+
+            if required_permission in permissions:
                 return func(*args, **kwargs)
             else:
                 raise Forbidden()
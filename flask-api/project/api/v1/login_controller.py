@@ -1,6 +1,6 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from werkzeug.exceptions import BadRequest, Unauthorized
-from project import app, db
+from project import db
 from project.services.login_service import AuthService
 from flask_jwt_extended import jwt_required, create_access_token, set_access_cookies, unset_jwt_cookies, get_jwt_identity, get_jwt
 from datetime import timedelta
@@ -11,7 +11,7 @@ login_blueprint = Blueprint('login', __name__)
 
 @login_blueprint.route('/form', methods=['OPTIONS'])
 def handle_preflight():
-    response = app.make_default_options_response()
+    response = current_app.make_default_options_response()
     response.headers['Access-Control-Allow-Credentials'] = 'true'
     return response
 
@@ -35,6 +35,6 @@ def login():
 @login_blueprint.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    user_id=get_jwt_identity()
+    user_id=int(get_jwt_identity())
     AuthService.logout_user(user_id)
     return BaseResponse.success(message="Logout successfully!")
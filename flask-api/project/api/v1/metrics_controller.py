@@ -0,0 +1,56 @@
+import hmac
+import ipaddress
+from flask import Blueprint, Response, current_app, request
+from werkzeug.exceptions import Unauthorized
+from project.database.pool import PoolMetrics
+from project.services.metrics import Metrics
+from project.services.notification_service import PushNotification
+
+
+metrics_blueprint = Blueprint('metrics_controller', __name__)
+
+
+def is_allowed_scraper() -> bool:
+    token = current_app.config['METRICS_TOKEN']
+    if token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return True
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False)
+               for network in current_app.config['METRICS_ALLOWED_IPS'])
+
+
+@metrics_blueprint.before_request
+def require_scraper() -> None:
+    # closed unless METRICS_TOKEN or METRICS_ALLOWED_IPS is configured
+    if not is_allowed_scraper():
+        raise Unauthorized('Metrics require the scrape token or an allowed address.')
+
+
+@metrics_blueprint.route("/metrics", methods=["GET"])
+def get_metrics() -> Response:
+    lines = Metrics.render()
+
+    pool = PoolMetrics.snapshot()
+    lines += Metrics.render_value('db_pool_checked_out', 'gauge', 'Connections currently checked out.',
+                                  {(): pool["checked_out"]})
+    lines += Metrics.render_value('db_pool_checked_out_max', 'gauge', 'Most connections checked out at once.',
+                                  {(): pool["max_checked_out"]})
+    for name, description in (('checkouts', 'Connection checkouts.'),
+                              ('overflows', 'Checkouts served by an overflow connection.'),
+                              ('timeouts', 'Checkouts that timed out waiting for a connection.'),
+                              ('connects', 'New database connections opened.'),
+                              ('invalidations', 'Connections invalidated after an error.')):
+        lines += Metrics.render_value(f'db_pool_{name}_total', 'counter', description, {(): pool[name]})
+    lines += Metrics.render_value('db_pool_wait_seconds_total', 'counter', 'Time spent waiting for a connection.',
+                                  {(): pool["wait_seconds_total"]})
+
+    push = PushNotification.counters()
+    lines += Metrics.render_value('fcm_push_results_total', 'counter', 'Push deliveries by result.',
+                                  {(result,): push[result] for result in ('sent', 'failed')}, ('result',))
+    lines += Metrics.render_value('fcm_pruned_tokens_total', 'counter', 'Dead FCM tokens removed from users.',
+                                  {(): push["pruned_tokens"]})
+
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from project import app, db
+from project import db
 from werkzeug.exceptions import Conflict, InternalServerError, NotFound, BadRequest, Unauthorized
 from project.models.user import User
 from project.models.role import Role
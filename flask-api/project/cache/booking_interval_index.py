@@ -0,0 +1,247 @@
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from project.config import BaseConfig
+from project.database.excute.booking import BookingExecutor
+from project.models import Booking
+
+Interval = Tuple[datetime, datetime, int]
+
+
+class _Node:
+    __slots__ = ('key', 'priority', 'max_end', 'left', 'right')
+
+    def __init__(self, key: Interval):
+        self.key = key
+        self.priority = random.random()
+        self.max_end = key[1]
+        self.left: Optional['_Node'] = None
+        self.right: Optional['_Node'] = None
+
+    def update(self) -> None:
+        self.max_end = self.key[1]
+        for child in (self.left, self.right):
+            if child is not None and child.max_end > self.max_end:
+                self.max_end = child.max_end
+
+
+def _split(node: Optional[_Node], key: Interval) -> Tuple[Optional[_Node], Optional[_Node]]:
+    # (keys < key, keys >= key)
+    if node is None:
+        return None, None
+    if node.key < key:
+        node.right, right = _split(node.right, key)
+        node.update()
+        return node, right
+    left, node.left = _split(node.left, key)
+    node.update()
+    return left, node
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    if left is None or right is None:
+        return left or right
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.update()
+        return left
+    right.left = _merge(left, right.left)
+    right.update()
+    return right
+
+
+def _remove(node: Optional[_Node], key: Interval) -> Optional[_Node]:
+    if node is None:
+        return None
+    if key < node.key:
+        node.left = _remove(node.left, key)
+    elif node.key < key:
+        node.right = _remove(node.right, key)
+    else:
+        return _merge(node.left, node.right)
+    node.update()
+    return node
+
+
+def _find_overlap(node: Optional[_Node], time_start: datetime, time_end: datetime,
+                  exclude_booking_id: Optional[int]) -> Optional[int]:
+    # max_end prunes subtrees that end before time_start, the key order those that start after time_end
+    if node is None or node.max_end <= time_start:
+        return None
+    found = _find_overlap(node.left, time_start, time_end, exclude_booking_id)
+    if found is not None or node.key[0] >= time_end:
+        return found
+    if node.key[1] > time_start and node.key[2] != exclude_booking_id:
+        return node.key[2]
+    return _find_overlap(node.right, time_start, time_end, exclude_booking_id)
+
+
+class RoomIntervalIndex:
+    """Bookings of one room in a treap ordered by start, each node holding the latest end in its subtree."""
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        self._root: Optional[_Node] = None
+        self._keys: Dict[int, Interval] = {}
+        for time_start, time_end, booking_id in intervals:
+            self.add(booking_id, time_start, time_end)
+        self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def booking_ids(self) -> Iterable[int]:
+        return self._keys.keys()
+
+    def add(self, booking_id: int, time_start: datetime, time_end: datetime) -> None:
+        self.remove(booking_id)
+        key = (time_start, time_end, booking_id)
+        left, right = _split(self._root, key)
+        self._root = _merge(_merge(left, _Node(key)), right)
+        self._keys[booking_id] = key
+
+    def remove(self, booking_id: int) -> None:
+        key = self._keys.pop(booking_id, None)
+        if key is not None:
+            self._root = _remove(self._root, key)
+
+    def find_overlap(self, time_start: datetime, time_end: datetime,
+                     exclude_booking_id: Optional[int] = None) -> Optional[int]:
+        return _find_overlap(self._root, time_start, time_end, exclude_booking_id)
+
+
+class BookingIntervalIndex:
+    _rooms: Dict[int, RoomIntervalIndex] = {}
+    _locations: Dict[int, int] = {}
+    # bumped by every committed change to a room, so a load that raced a commit is not installed
+    _generations: Dict[int, int] = {}
+    _room_locks: Dict[int, threading.Lock] = {}
+    _lock = threading.Lock()
+    ttl = BaseConfig.BOOKING_INDEX_TTL
+    LOAD_ATTEMPTS = 3
+
+    @staticmethod
+    def init_app(app: Flask) -> None:
+        BookingIntervalIndex.ttl = app.config['BOOKING_INDEX_TTL']
+
+    @staticmethod
+    def _cached_room(room_id: int) -> Optional[RoomIntervalIndex]:
+        with BookingIntervalIndex._lock:
+            index = BookingIntervalIndex._rooms.get(room_id)
+            if index and time.monotonic() - index.loaded_at < BookingIntervalIndex.ttl:
+                return index
+        return None
+
+    @staticmethod
+    def _room_lock(room_id: int) -> threading.Lock:
+        with BookingIntervalIndex._lock:
+            return BookingIntervalIndex._room_locks.setdefault(room_id, threading.Lock())
+
+    @staticmethod
+    def _get_room(room_id: int) -> RoomIntervalIndex:
+        index = BookingIntervalIndex._cached_room(room_id)
+        if index:
+            return index
+
+        with BookingIntervalIndex._room_lock(room_id):
+            # another request may have loaded the room while this one waited
+            index = BookingIntervalIndex._cached_room(room_id)
+            if index:
+                return index
+            for _ in range(BookingIntervalIndex.LOAD_ATTEMPTS):
+                with BookingIntervalIndex._lock:
+                    generation = BookingIntervalIndex._generations.get(room_id, 0)
+                intervals = BookingExecutor.get_active_room_intervals(room_id, datetime.now())
+                index = RoomIntervalIndex(
+                    (time_start, time_end, booking_id) for booking_id, time_start, time_end in intervals)
+                with BookingIntervalIndex._lock:
+                    if BookingIntervalIndex._generations.get(room_id, 0) == generation:
+                        BookingIntervalIndex._drop_room(room_id)
+                        BookingIntervalIndex._rooms[room_id] = index
+                        for booking_id in index.booking_ids():
+                            BookingIntervalIndex._locations[booking_id] = room_id
+                        return index
+        # the room kept changing while it loaded: answer from the last load without caching it
+        return index
+
+    @staticmethod
+    def _drop_room(room_id: int) -> None:
+        index = BookingIntervalIndex._rooms.pop(room_id, None)
+        if index:
+            for booking_id in index.booking_ids():
+                BookingIntervalIndex._locations.pop(booking_id, None)
+
+    @staticmethod
+    def has_conflict(room_id: int, time_start: datetime, time_end: datetime,
+                     exclude_booking_id: Optional[int] = None) -> bool:
+        room_id = int(room_id)
+        index = BookingIntervalIndex._get_room(room_id)
+        with BookingIntervalIndex._lock:
+            candidate = index.find_overlap(time_start, time_end, exclude_booking_id)
+        if candidate is None:
+            return False
+
+        if exclude_booking_id is None:
+            existing_booking = BookingExecutor.check_room_availability(room_id, time_start, time_end)
+        else:
+            existing_booking = BookingExecutor.check_room_availability_update(
+                room_id, time_start, time_end, exclude_booking_id)
+        if not existing_booking:
+            BookingIntervalIndex.invalidate_room(room_id)
+        return existing_booking is not None
+
+    @staticmethod
+    def apply_change(booking_id: int, room_id: Optional[int], time_start, time_end, is_deleted: bool) -> None:
+        with BookingIntervalIndex._lock:
+            previous_room_id = BookingIntervalIndex._locations.pop(booking_id, None)
+            for changed_room_id in {previous_room_id, room_id} - {None}:
+                BookingIntervalIndex._generations[changed_room_id] = (
+                    BookingIntervalIndex._generations.get(changed_room_id, 0) + 1)
+            if previous_room_id in BookingIntervalIndex._rooms:
+                BookingIntervalIndex._rooms[previous_room_id].remove(booking_id)
+
+            index = BookingIntervalIndex._rooms.get(room_id)
+            if index is None or is_deleted:
+                return
+            index.add(booking_id, time_start, time_end)
+            BookingIntervalIndex._locations[booking_id] = room_id
+
+    @staticmethod
+    def invalidate_room(room_id: int) -> None:
+        with BookingIntervalIndex._lock:
+            BookingIntervalIndex._drop_room(int(room_id))
+
+    @staticmethod
+    def invalidate_all() -> None:
+        with BookingIntervalIndex._lock:
+            BookingIntervalIndex._rooms.clear()
+            BookingIntervalIndex._locations.clear()
+
+
+@event.listens_for(Booking, 'after_insert')
+@event.listens_for(Booking, 'after_update')
+def _booking_written(mapper, connection, target):
+    changes = object_session(target).info.setdefault('booking_index_changes', {})
+    room_id = int(target.room_id) if target.room_id is not None else None
+    changes[target.booking_id] = (room_id, target.time_start, target.time_end, target.is_deleted)
+
+
+@event.listens_for(Booking, 'after_delete')
+def _booking_deleted(mapper, connection, target):
+    changes = object_session(target).info.setdefault('booking_index_changes', {})
+    changes[target.booking_id] = (None, None, None, True)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_committed_changes(session):
+    for booking_id, change in session.info.pop('booking_index_changes', {}).items():
+        BookingIntervalIndex.apply_change(booking_id, *change)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('booking_index_changes', None)
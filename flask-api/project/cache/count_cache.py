@@ -0,0 +1,22 @@
+from typing import Callable, Hashable
+from flask import Flask
+from project.config import BaseConfig
+from project.cache.ttl_cache import TTLCache, MISSING
+from project.database.routing import fresh_reads
+
+
+class CountCache:
+    _cache = TTLCache(maxsize=BaseConfig.COUNT_CACHE_SIZE, ttl=BaseConfig.COUNT_CACHE_TTL)
+
+    @staticmethod
+    def init_app(app: Flask) -> None:
+        CountCache._cache.configure(app.config['COUNT_CACHE_SIZE'], app.config['COUNT_CACHE_TTL'])
+
+    @staticmethod
+    def get_or_compute(key: Hashable, compute: Callable[[], int]) -> int:
+        total = CountCache._cache.get(key)
+        if total is MISSING:
+            with fresh_reads():
+                total = compute()
+            CountCache._cache.set(key, total)
+        return total
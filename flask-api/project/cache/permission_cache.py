@@ -0,0 +1,129 @@
+from typing import FrozenSet, Optional, Union
+from flask import Flask
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session, object_session
+from project.config import BaseConfig
+from project.cache.ttl_cache import TTLCache, MISSING
+from project.database.excute.user import UserExecutor
+from project.models import User, Role, Permission, RoleHasPermission, UserHasRole
+
+
+class PermissionCache:
+    _permissions = TTLCache(maxsize=BaseConfig.PERMISSION_CACHE_SIZE, ttl=BaseConfig.PERMISSION_CACHE_TTL)
+    # short-lived: bounds how long another worker's role change takes to revoke tokens here
+    _role_versions = TTLCache(maxsize=BaseConfig.PERMISSION_CACHE_SIZE, ttl=BaseConfig.ROLE_VERSION_CACHE_TTL)
+
+    @staticmethod
+    def init_app(app: Flask) -> None:
+        PermissionCache._permissions.configure(app.config['PERMISSION_CACHE_SIZE'], app.config['PERMISSION_CACHE_TTL'])
+        PermissionCache._role_versions.configure(
+            app.config['PERMISSION_CACHE_SIZE'], app.config['ROLE_VERSION_CACHE_TTL'])
+
+    @staticmethod
+    def get_permissions(user_id: Union[int, str]) -> FrozenSet[str]:
+        key = str(user_id)
+        permissions = PermissionCache._permissions.get(key)
+        if permissions is MISSING:
+            permissions = frozenset(UserExecutor.get_permission_names_by_user(user_id))
+            PermissionCache._permissions.set(key, permissions)
+        return permissions
+
+    @staticmethod
+    def get_role_version(user_id: Union[int, str]) -> Optional[int]:
+        key = str(user_id)
+        role_version = PermissionCache._role_versions.get(key)
+        if role_version is MISSING:
+            role_version = UserExecutor.get_role_version(user_id)
+            PermissionCache._role_versions.set(key, role_version)
+        return role_version
+
+    @staticmethod
+    def remember_role_version(user_id: Union[int, str], role_version: Optional[int]) -> None:
+        PermissionCache._role_versions.set(str(user_id), role_version)
+
+    @staticmethod
+    def invalidate_user(user_id: Union[int, str]) -> None:
+        PermissionCache._permissions.pop(str(user_id))
+        PermissionCache._role_versions.pop(str(user_id))
+
+    @staticmethod
+    def invalidate_all() -> None:
+        PermissionCache._permissions.clear()
+        PermissionCache._role_versions.clear()
+
+
+ALL_USERS = '*'
+
+
+def _bump_role_version(connection, user_filter) -> None:
+    user_table = User.__table__
+    connection.execute(
+        update(user_table)
+        .where(user_filter)
+        .values(role_version=user_table.c.role_version + 1)
+    )
+
+
+def _queue_invalidation(target, user_id: Optional[int] = None) -> None:
+    # applied after commit, so a concurrent reload cannot re-cache the old permissions
+    pending = object_session(target).info.setdefault('permission_invalidations', set())
+    pending.add(ALL_USERS if user_id is None else str(user_id))
+
+
+def _users_with_role(role_id: int):
+    return User.__table__.c.user_id.in_(
+        select(UserHasRole.user_id).where(UserHasRole.role_id == role_id))
+
+
+@event.listens_for(UserHasRole, 'after_insert')
+@event.listens_for(UserHasRole, 'after_update')
+@event.listens_for(UserHasRole, 'after_delete')
+def _user_role_changed(mapper, connection, target):
+    _bump_role_version(connection, User.__table__.c.user_id == target.user_id)
+    _queue_invalidation(target, target.user_id)
+
+
+# the User columns the permission lookup reads; logins rewrite fcm_token and must not evict
+USER_PERMISSION_COLUMNS = ('is_deleted', 'role_version')
+
+
+@event.listens_for(User, 'after_update')
+def _user_changed(mapper, connection, target):
+    attrs = inspect(target).attrs
+    if any(getattr(attrs, column).history.has_changes() for column in USER_PERMISSION_COLUMNS):
+        _queue_invalidation(target, target.user_id)
+
+
+@event.listens_for(RoleHasPermission, 'after_insert')
+@event.listens_for(RoleHasPermission, 'after_update')
+@event.listens_for(RoleHasPermission, 'after_delete')
+@event.listens_for(Role, 'after_update')
+@event.listens_for(Role, 'after_delete')
+def _role_changed(mapper, connection, target):
+    _bump_role_version(connection, _users_with_role(target.role_id))
+    _queue_invalidation(target)
+
+
+@event.listens_for(Permission, 'after_update')
+@event.listens_for(Permission, 'after_delete')
+def _permission_changed(mapper, connection, target):
+    roles_with_permission = select(RoleHasPermission.role_id).where(
+        RoleHasPermission.permission_id == target.permission_id)
+    _bump_role_version(connection, User.__table__.c.user_id.in_(
+        select(UserHasRole.user_id).where(UserHasRole.role_id.in_(roles_with_permission))))
+    _queue_invalidation(target)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    pending = session.info.pop('permission_invalidations', set())
+    if ALL_USERS in pending:
+        PermissionCache.invalidate_all()
+    else:
+        for user_id in pending:
+            PermissionCache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_invalidations(session):
+    session.info.pop('permission_invalidations', None)
@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import Dict, Optional
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from project.config import BaseConfig
+from project.cache.ttl_cache import TTLCache, MISSING
+from project.models import Booking, Room
+
+
+class RoomStatusCache:
+    _pages = TTLCache(maxsize=BaseConfig.ROOM_STATUS_CACHE_SIZE, ttl=BaseConfig.ROOM_STATUS_CACHE_MAX_TTL)
+
+    @staticmethod
+    def init_app(app: Flask) -> None:
+        RoomStatusCache._pages.configure(app.config['ROOM_STATUS_CACHE_SIZE'], app.config['ROOM_STATUS_CACHE_MAX_TTL'])
+
+    @staticmethod
+    def get(page: int, per_page: int) -> Optional[Dict]:
+        result = RoomStatusCache._pages.get((page, per_page))
+        return None if result is MISSING else result
+
+    @staticmethod
+    def set(page: int, per_page: int, result: Dict, expires_at: Optional[datetime]) -> None:
+        ttl = RoomStatusCache._pages.ttl
+        if expires_at is not None:
+            ttl = min(ttl, (expires_at - datetime.now()).total_seconds())
+        if ttl > 0:
+            RoomStatusCache._pages.set((page, per_page), result, ttl=ttl)
+
+    @staticmethod
+    def invalidate_all() -> None:
+        RoomStatusCache._pages.clear()
+
+
+@event.listens_for(Booking, 'after_insert')
+@event.listens_for(Booking, 'after_update')
+@event.listens_for(Booking, 'after_delete')
+@event.listens_for(Room, 'after_insert')
+@event.listens_for(Room, 'after_update')
+@event.listens_for(Room, 'after_delete')
+def _room_status_changed(mapper, connection, target):
+    object_session(target).info['room_status_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    if session.info.pop('room_status_changed', False):
+        RoomStatusCache.invalidate_all()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('room_status_changed', None)
@@ -4,22 +4,70 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class BaseConfig:
-    DEBUG = True
+    DEBUG = os.environ.get('FLASK_DEBUG', 'false').lower() in ('1', 'true')
     SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI')
+    SQLALCHEMY_REPLICA_URIS = [uri for uri in os.environ.get('SQLALCHEMY_REPLICA_URIS', '').split(',') if uri]
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+    REPLICA_STICKY_SIZE = int(os.environ.get('REPLICA_STICKY_SIZE', 10000))
+    REPLICA_RETRY_SECONDS = int(os.environ.get('REPLICA_RETRY_SECONDS', 30))
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    DB_POOL_SLOW_CHECKOUT_MS = int(os.environ.get('DB_POOL_SLOW_CHECKOUT_MS', 100))
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_ALLOWED_IPS = [network for network in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if network]
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY')
     TOKEN_EXPIRATION_DAYS = os.environ.get('TOKEN_EXPIRATION_DAYS')
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND')
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL')
     SCHEDULER_API_ENABLED= os.environ.get('SCHEDULER_API_ENABLED')
-    FCM_SERVER_KEY = os.environ.get('FCM_SERVER_KEY')
+    FCM_PROJECT_ID = os.environ.get('FCM_PROJECT_ID')
+    FCM_END_POINT = os.environ.get('FCM_END_POINT')
+    FCM_CONCURRENCY = int(os.environ.get('FCM_CONCURRENCY', 10))
+    FCM_TIMEOUT_SECONDS = int(os.environ.get('FCM_TIMEOUT_SECONDS', 10))
+    FCM_MAX_SENDS_PER_SECOND = int(os.environ.get('FCM_MAX_SENDS_PER_SECOND', 500))
+    FCM_BACKOFF_SECONDS = int(os.environ.get('FCM_BACKOFF_SECONDS', 1))
+    FCM_BACKOFF_MAX_SECONDS = int(os.environ.get('FCM_BACKOFF_MAX_SECONDS', 60))
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
-    MAIL_PORT = int(os.environ.get('MAIL_PORT'))
-    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS').lower() == 'true'
-    MAIL_USE_SSL = os.environ.get('MAIL_USE_SSL').lower() == 'true'
+    MAIL_PORT = int(os.environ.get('MAIL_PORT', 25))
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'false').lower() == 'true'
+    MAIL_USE_SSL = os.environ.get('MAIL_USE_SSL', 'false').lower() == 'true'
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
     FIREBASE_ADMIN_SDK=os.environ.get('FIREBASE_ADMIN_SDK')
+    PERMISSION_CACHE_TTL = int(os.environ.get('PERMISSION_CACHE_TTL', 300))
+    PERMISSION_CACHE_SIZE = int(os.environ.get('PERMISSION_CACHE_SIZE', 10000))
+    ROLE_VERSION_CACHE_TTL = int(os.environ.get('ROLE_VERSION_CACHE_TTL', 5))
+    BOOKING_INDEX_TTL = int(os.environ.get('BOOKING_INDEX_TTL', 300))
+    COUNT_CACHE_TTL = int(os.environ.get('COUNT_CACHE_TTL', 30))
+    COUNT_CACHE_SIZE = int(os.environ.get('COUNT_CACHE_SIZE', 10000))
+    MAX_PER_PAGE = int(os.environ.get('MAX_PER_PAGE', 100))
+    BOOKING_STREAM_BATCH_SIZE = int(os.environ.get('BOOKING_STREAM_BATCH_SIZE', 500))
+    ROOM_STATUS_CACHE_MAX_TTL = int(os.environ.get('ROOM_STATUS_CACHE_MAX_TTL', 60))
+    ROOM_STATUS_CACHE_SIZE = int(os.environ.get('ROOM_STATUS_CACHE_SIZE', 1000))
+    TASK_FALLBACK_WORKERS = int(os.environ.get('TASK_FALLBACK_WORKERS', 4))
+    MAIL_POOL_SIZE = int(os.environ.get('MAIL_POOL_SIZE', 2))
+    MAIL_BATCH_SIZE = int(os.environ.get('MAIL_BATCH_SIZE', 50))
+    MAIL_BATCH_MAX_SECONDS = int(os.environ.get('MAIL_BATCH_MAX_SECONDS', 30))
+    MAIL_CONNECTION_MAX_AGE = int(os.environ.get('MAIL_CONNECTION_MAX_AGE', 300))
+    MAIL_CONNECTION_MAX_IDLE = int(os.environ.get('MAIL_CONNECTION_MAX_IDLE', 60))
+    SCHEDULER_AUTOSTART = os.environ.get('SCHEDULER_AUTOSTART', 'false').lower() == 'true'
+    SCHEDULER_LEASE_TTL = int(os.environ.get('SCHEDULER_LEASE_TTL', 30))
+    SCHEDULER_HEARTBEAT_SECONDS = int(os.environ.get('SCHEDULER_HEARTBEAT_SECONDS', 10))
+    REMINDER_LEAD_MINUTES = [int(minutes) for minutes in os.environ.get('REMINDER_LEAD_MINUTES', '10').split(',')]
+    REMINDER_WINDOW_MINUTES = int(os.environ.get('REMINDER_WINDOW_MINUTES', 30))
+    REMINDER_TICK_SECONDS = int(os.environ.get('REMINDER_TICK_SECONDS', 15))
+    REMINDER_REFRESH_SECONDS = int(os.environ.get('REMINDER_REFRESH_SECONDS', 60))
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 100))
+    OUTBOX_POLL_SECONDS = int(os.environ.get('OUTBOX_POLL_SECONDS', 5))
+    OUTBOX_CLAIM_SECONDS = int(os.environ.get('OUTBOX_CLAIM_SECONDS', 300))
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 5))
+    OUTBOX_RETRY_BASE_SECONDS = int(os.environ.get('OUTBOX_RETRY_BASE_SECONDS', 30))
+    OUTBOX_RETRY_MAX_SECONDS = int(os.environ.get('OUTBOX_RETRY_MAX_SECONDS', 3600))
+    OUTBOX_KICK = os.environ.get('OUTBOX_KICK', 'true').lower() == 'true'
     
 class DevelopmentConfig(BaseConfig):
     DEBUG = True
@@ -1,20 +1,48 @@
 from project.models import Booking, BookingUser, Room, User
-from typing import List, Optional, Union
+from typing import Iterator, List, Optional, Union
 from project import db
+from project.database.routing import read_only
 from flask_jwt_extended import get_jwt_identity
 from datetime import datetime
-from sqlalchemy.orm import aliased, session
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import aliased, session, joinedload, selectinload
+from werkzeug.exceptions import Conflict
 import json
 
 
+# MySQL deadlock and lock wait timeout
+LOCK_CONFLICT_ERRORS = (1213, 1205)
+
+
 class BookingExecutor:
 
     @staticmethod
-    def get_bookings_in_date_range(start_date, end_date) -> List[Booking]:
+    def with_list_relations(query):
+        return query.options(
+            selectinload(Booking.booking_user).joinedload(BookingUser.user),
+            joinedload(Booking.room),
+            joinedload(Booking.user)
+        )
+
+    @staticmethod
+    def date_range_query(start_date, end_date):
         return Booking.query.filter(
             Booking.is_deleted == False,
             Booking.time_end.between(start_date, end_date)
-        ).all()
+        )
+
+    @staticmethod
+    @read_only
+    def get_bookings_in_date_range(start_date, end_date) -> List[Booking]:
+        return BookingExecutor.with_list_relations(
+            BookingExecutor.date_range_query(start_date, end_date)).all()
+
+    @staticmethod
+    @read_only
+    def stream_bookings_in_date_range(start_date, end_date, batch_size: int) -> Iterator[Booking]:
+        return BookingExecutor.with_list_relations(
+            BookingExecutor.date_range_query(start_date, end_date)).yield_per(batch_size)
 
     @staticmethod
     def check_room_availability_update(room_id: int, time_start: str, time_end: str, booking_id: int) -> Optional[Booking]:
@@ -27,30 +55,74 @@ class BookingExecutor:
         ).first()
 
     @staticmethod
-    def create_booking(room_id: int, title: str, time_start: str, time_end: str, user_ids: List[int]) -> Booking:
-        user_id = get_jwt_identity()
+    def ensure_room_available(booking: Booking) -> None:
+        existing_booking = Booking.query.filter(
+            Booking.room_id == booking.room_id,
+            Booking.is_deleted == False,
+            Booking.time_end > booking.time_start,
+            Booking.time_start < booking.time_end,
+            Booking.booking_id != booking.booking_id
+        ).with_for_update().first()
+        if existing_booking:
+            raise Conflict('Room is already booked for this time')
+
+    @staticmethod
+    def is_lock_conflict(error: OperationalError) -> bool:
+        code = getattr(error.orig, 'errno', None)
+        if code is None and getattr(error.orig, 'args', None):
+            code = error.orig.args[0]
+        return code in LOCK_CONFLICT_ERRORS
+
+    @staticmethod
+    def get_active_room_intervals(room_id: int, since: datetime):
+        return db.session.query(Booking.booking_id, Booking.time_start, Booking.time_end).filter(
+            Booking.room_id == room_id,
+            Booking.is_deleted == False,
+            Booking.time_end > since
+        ).all()
+
+    @staticmethod
+    def insert_attendees(booking_id: int, user_ids: List[int], creator_id: int) -> None:
+        if user_ids:
+            # render_nulls keeps rows with and without is_attending in one executemany
+            db.session.execute(insert(BookingUser).execution_options(render_nulls=True), [
+                {'user_id': id, 'booking_id': booking_id, 'is_attending': True if id == creator_id else None}
+                for id in user_ids
+            ])
+
+    @staticmethod
+    def add_booking(room_id: int, title: str, time_start: str, time_end: str, user_ids: List[int],
+                    is_accepted: bool) -> Booking:
+        # flushed, not committed: the caller commits the booking, its attendees and its outbox rows together
+        user_id = int(get_jwt_identity())
         try:
             new_booking = Booking(
-                room_id=room_id, title=title, time_start=time_start, time_end=time_end, is_accepted=True, is_deleted=False, creator_id=user_id)
+                room_id=room_id, title=title, time_start=time_start, time_end=time_end, is_accepted=is_accepted, is_deleted=False, creator_id=user_id)
             db.session.add(new_booking)
-            db.session.commit()
+            db.session.flush()
+            BookingExecutor.ensure_room_available(new_booking)
 
-            user_bookings = [
-                BookingUser(user_id=id, booking_id=new_booking.booking_id,
-                            is_attending=True if id == user_id else None)
-                for id in user_ids
-            ]
-
-            db.session.add_all(user_bookings)
-            db.session.commit()
+            BookingExecutor.insert_attendees(new_booking.booking_id, user_ids, user_id)
             return new_booking
+        except OperationalError as e:
+            db.session.rollback()
+            # concurrent inserts into the same room range can deadlock on gap locks; one of them loses
+            if BookingExecutor.is_lock_conflict(e):
+                raise Conflict('Room is already booked for this time') from e
+            raise e
         except Exception as e:
             db.session.rollback()
             raise e
 
+    @staticmethod
+    def create_booking(room_id: int, title: str, time_start: str, time_end: str, user_ids: List[int]) -> Booking:
+        new_booking = BookingExecutor.add_booking(room_id, title, time_start, time_end, user_ids, is_accepted=True)
+        return BookingExecutor.get_booking(new_booking.booking_id)
+
     @staticmethod
     def get_booking(booking_id: int) -> Optional[Booking]:
-        return Booking.query.get(booking_id)
+        return BookingExecutor.with_list_relations(
+            Booking.query.filter(Booking.booking_id == booking_id)).first()
     
     @staticmethod
     def get_booking_creator(booking_id: int) -> Optional[int]:
@@ -79,14 +151,26 @@ class BookingExecutor:
             booking.time_start = time_start
             booking.time_end = time_end
 
-            BookingUser.query.filter_by(booking_id=booking.booking_id).delete()
+            # only changed attendees are written, so kept attendees keep their RSVP
+            current_ids = {booking_user.user_id for booking_user in booking.booking_user}
+            removed_ids = current_ids.difference(user_ids)
+            added_ids = [user_id for user_id in dict.fromkeys(user_ids) if user_id not in current_ids]
 
-            for user_id in user_ids:
-                user_booking = BookingUser(
-                    user_id=user_id, booking_id=booking.booking_id, is_attending=False)
-                db.session.add(user_booking)
+            if removed_ids:
+                BookingUser.query.filter(
+                    BookingUser.booking_id == booking.booking_id,
+                    BookingUser.user_id.in_(removed_ids)
+                ).delete(synchronize_session=False)
+            BookingExecutor.insert_attendees(booking.booking_id, added_ids, booking.creator_id)
 
+            db.session.flush()
+            BookingExecutor.ensure_room_available(booking)
             db.session.commit()
+        except OperationalError as e:
+            db.session.rollback()
+            if BookingExecutor.is_lock_conflict(e):
+                raise Conflict('Room is already booked for this time') from e
+            raise e
         except Exception as e:
             db.session.rollback()
             raise e
@@ -100,24 +184,26 @@ class BookingExecutor:
         db.session.commit()
 
     @staticmethod
+    @read_only
     def search_booking_users(start_date: str, end_date: str, user_ids: List[int]) -> List[Booking]:
-        bookings = Booking.query.join(BookingUser).filter(
+        bookings = BookingExecutor.with_list_relations(Booking.query.join(BookingUser).filter(
             Booking.is_deleted == False,
             Booking.time_start >= start_date,
             Booking.time_start <= end_date,
             BookingUser.user_id.in_(user_ids)
-        ).all()
+        )).all()
         return bookings
 
     @staticmethod
+    @read_only
     def search_booking_room(start_date: str, end_date: str, room_id: int) -> List[Booking]:
-        bookings = Booking.query.filter(
+        bookings = BookingExecutor.with_list_relations(Booking.query.filter(
             Booking.is_deleted == False,
             Booking.deleted_at == None,
             Booking.time_start >= start_date,
             Booking.time_start <= end_date,
             Booking.room_id == room_id
-        ).all()
+        )).all()
         return bookings
 
     @staticmethod
@@ -130,72 +216,100 @@ class BookingExecutor:
         ).first()
 
     @staticmethod
-    def get_bookings_in_date_range_user(start_date, end_date, user_id) -> List[Booking]:
+    def date_range_user_query(start_date, end_date, user_id):
         return Booking.query.join(BookingUser, Booking.booking_id == BookingUser.booking_id).filter(
             Booking.is_deleted == False,
             Booking.time_end.between(start_date, end_date),
             BookingUser.user_id == user_id
-        ).all()
+        )
 
     @staticmethod
-    def create_booking_belong_to_user(room_id: int, title: str, time_start: str, time_end: str, user_ids: List[int]) -> Booking:
-        user_id = get_jwt_identity()
-        try:
-            new_booking = Booking(
-                room_id=room_id, title=title, time_start=time_start, time_end=time_end, is_accepted=False, is_deleted=False, creator_id=user_id)
-            db.session.add(new_booking)
-            db.session.commit()
+    @read_only
+    def get_bookings_in_date_range_user(start_date, end_date, user_id) -> List[Booking]:
+        return BookingExecutor.with_list_relations(
+            BookingExecutor.date_range_user_query(start_date, end_date, user_id)).all()
 
-            user_bookings = [
-                BookingUser(user_id=id, booking_id=new_booking.booking_id,
-                            is_attending=True if id == user_id else None)
-                for id in user_ids
-            ]
+    @staticmethod
+    @read_only
+    def stream_bookings_in_date_range_user(start_date, end_date, user_id, batch_size: int) -> Iterator[Booking]:
+        return BookingExecutor.with_list_relations(
+            BookingExecutor.date_range_user_query(start_date, end_date, user_id)).yield_per(batch_size)
 
-            db.session.add_all(user_bookings)
-            db.session.commit()
-            return new_booking
-        except Exception as e:
-            db.session.rollback()
-            raise e
+    @staticmethod
+    def create_booking_belong_to_user(room_id: int, title: str, time_start: str, time_end: str, user_ids: List[int]) -> Booking:
+        return BookingExecutor.add_booking(room_id, title, time_start, time_end, user_ids, is_accepted=False)
 
     @staticmethod
-    def user_view_list_booked(page: int, per_page: int, creator_id) -> List[Booking]:
-        bookings = (Booking.query.filter(
-            Booking.creator_id == creator_id)
-            .order_by(Booking.booking_id.desc())
-            .paginate(page=page, per_page=per_page, error_out=False)
-        )
-        return bookings
+    def user_booked_query(creator_id: int):
+        return Booking.query.filter(Booking.creator_id == creator_id)
 
     @staticmethod
-    def admin_view_booking_pending(page: int, per_page: int) -> List[Booking]:
-        bookings = (Booking.query.filter(
+    def booking_pending_query():
+        return Booking.query.filter(
             Booking.is_accepted == False,
             Booking.is_deleted == False,
             Booking.deleted_at == None)
-            .order_by(Booking.booking_id.desc())
-            .paginate(page=page, per_page=per_page, error_out=False)
-        )
-        return bookings
 
     @staticmethod
-    def view_list_invite(page: int, per_page: int, user_id: int) -> List[Booking]:
-        bookings = (Booking.query.join(BookingUser, Booking.booking_id == BookingUser.booking_id).filter(
+    def list_invite_query(user_id: int):
+        return Booking.query.join(BookingUser, Booking.booking_id == BookingUser.booking_id).filter(
             Booking.is_deleted == False,
             Booking.is_accepted == True,
             Booking.time_start > datetime.now(),
             BookingUser.user_id == user_id)
+
+    @staticmethod
+    @read_only
+    def paginate_bookings(query, page: int, per_page: int):
+        return (BookingExecutor.with_list_relations(query)
             .order_by(Booking.booking_id.desc())
             .paginate(page=page, per_page=per_page, error_out=False)
         )
-        return bookings
+
+    @staticmethod
+    @read_only
+    def keyset_bookings(query, before_booking_id: Optional[int], limit: int) -> List[Booking]:
+        if before_booking_id is not None:
+            query = query.filter(Booking.booking_id < before_booking_id)
+        return (BookingExecutor.with_list_relations(query)
+            .order_by(Booking.booking_id.desc())
+            .limit(limit)
+            .all()
+        )
+
+    @staticmethod
+    @read_only
+    def count_bookings(query) -> int:
+        return query.order_by(None).count()
+
+    @staticmethod
+    def user_view_list_booked(page: int, per_page: int, creator_id) -> List[Booking]:
+        return BookingExecutor.paginate_bookings(
+            BookingExecutor.user_booked_query(creator_id), page, per_page)
+
+    @staticmethod
+    def admin_view_booking_pending(page: int, per_page: int) -> List[Booking]:
+        return BookingExecutor.paginate_bookings(
+            BookingExecutor.booking_pending_query(), page, per_page)
+
+    @staticmethod
+    def view_list_invite(page: int, per_page: int, user_id: int) -> List[Booking]:
+        return BookingExecutor.paginate_bookings(
+            BookingExecutor.list_invite_query(user_id), page, per_page)
     
     @staticmethod
-    def get_list_meeting_cooming(time_cooming: str):
-        bookings = Booking.query.filter(
-                Booking.is_deleted == False,
-                Booking.deleted_at == None,
-                Booking.time_start == (time_cooming)
-            ).all()
-        return bookings
+    def get_upcoming_booking_starts(since: datetime, until: datetime):
+        return db.session.query(Booking.booking_id, Booking.time_start).filter(
+            Booking.is_deleted == False,
+            Booking.deleted_at == None,
+            Booking.time_start > since,
+            Booking.time_start <= until
+        ).all()
+
+    @staticmethod
+    def get_bookings_for_reminder(booking_ids: List[int]) -> List[Booking]:
+        return BookingExecutor.with_list_relations(Booking.query.filter(
+            Booking.booking_id.in_(booking_ids),
+            Booking.is_deleted == False,
+            Booking.deleted_at == None
+        )).all()
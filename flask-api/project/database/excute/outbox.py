@@ -0,0 +1,75 @@
+from project.models import NotificationOutbox
+from project import db
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import update
+import json
+
+
+class OutboxExecutor:
+
+    @staticmethod
+    def add(kind: str, payload: Dict) -> None:
+        db.session.add(NotificationOutbox(kind=kind, payload=json.dumps(payload, default=str)))
+
+    @staticmethod
+    def claim_batch(limit: int, claim_seconds: int) -> List[Dict]:
+        now = datetime.now()
+        try:
+            rows = (NotificationOutbox.query
+                .filter(NotificationOutbox.status == NotificationOutbox.PENDING,
+                        NotificationOutbox.available_at <= now)
+                .order_by(NotificationOutbox.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .all())
+            claimed = []
+            for row in rows:
+                row.attempts += 1
+                row.available_at = now + timedelta(seconds=claim_seconds)
+                claimed.append({"id": row.id, "kind": row.kind, "payload": json.loads(row.payload),
+                                "attempts": row.attempts})
+            db.session.commit()
+            return claimed
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def mark_sent(outbox_ids: List[int]) -> None:
+        try:
+            db.session.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id.in_(outbox_ids))
+                .values(status=NotificationOutbox.SENT, sent_at=datetime.now(), last_error=None)
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def retry_later(outbox_id: int, payload: Dict, available_at: datetime, error: str) -> None:
+        try:
+            db.session.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id == outbox_id)
+                .values(payload=json.dumps(payload, default=str), available_at=available_at, last_error=error)
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def mark_failed(outbox_id: int, payload: Dict, error: str) -> None:
+        try:
+            db.session.execute(
+                update(NotificationOutbox)
+                .where(NotificationOutbox.id == outbox_id)
+                .values(status=NotificationOutbox.FAILED, payload=json.dumps(payload, default=str), last_error=error)
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
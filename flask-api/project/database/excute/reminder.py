@@ -0,0 +1,29 @@
+from project.models import ReminderSentLog
+from project import db
+from datetime import datetime
+from typing import Set, Tuple
+from sqlalchemy.exc import IntegrityError
+
+
+class ReminderExecutor:
+
+    @staticmethod
+    def mark_sent(booking_id: int, lead_minutes: int, time_start: datetime) -> bool:
+        try:
+            db.session.add(ReminderSentLog(booking_id=booking_id, lead_minutes=lead_minutes, time_start=time_start))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def get_sent(since: datetime, until: datetime) -> Set[Tuple[int, int, datetime]]:
+        return set(db.session.query(ReminderSentLog.booking_id, ReminderSentLog.lead_minutes,
+                                    ReminderSentLog.time_start).filter(
+            ReminderSentLog.time_start > since,
+            ReminderSentLog.time_start <= until
+        ).all())
@@ -1,18 +1,20 @@
 from project.models import Room, Booking
 from math import ceil
 from project import db
+from project.database.routing import read_only
 from datetime import datetime
-from itertools import islice
-from sqlalchemy import or_
+from sqlalchemy import or_, exists, func, select, case
 from typing import Optional, Union, List, Tuple
 
 class RoomExecutor:
     @staticmethod
+    @read_only
     def get_paginated_rooms(page, per_page):
         query = Room.query.paginate(page=page, per_page=per_page, error_out=False)
         return query.items, query.total, ceil(query.total / per_page)
     
     @staticmethod
+    @read_only
     def get_room_detail(room_id: int) -> Optional[dict]:
         room = Room.query.get_or_404(room_id)
         if room:
@@ -69,37 +71,44 @@ class RoomExecutor:
 
 
     @staticmethod
-    def get_rooms_with_status(page: int, per_page: int):
-        all_rooms = Room.query.all()
-
-        start = (page - 1) * per_page
-        end = start + per_page
-        paginated_rooms = list(islice(all_rooms, start, end))
-
+    @read_only
+    def get_rooms_with_status(page: int, per_page: int) -> Tuple[List[Tuple[Room, bool, Optional[datetime]]], int, int]:
         current_time = datetime.now()
+        is_busy = exists().where(
+            Booking.room_id == Room.room_id,
+            Booking.is_deleted == False,
+            Booking.time_start <= current_time,
+            Booking.time_end >= current_time
+        ).correlate(Room)
+        next_boundary = (select(func.min(case(
+                (Booking.time_start > current_time, Booking.time_start),
+                else_=Booking.time_end)))
+            .where(
+                Booking.room_id == Room.room_id,
+                Booking.is_deleted == False,
+                Booking.time_end >= current_time)
+            .correlate(Room)
+            .scalar_subquery()
+        )
 
-        for room in paginated_rooms:
-            current_bookings = Booking.query.filter(
-                Booking.room_id == room.room_id,
-                Booking.time_start <= current_time,
-                Booking.time_end >= current_time
-            ).all()
-
-            room.is_blocked = bool(current_bookings)
-
-            if room.is_blocked:
-                room.description = "BUSY"
-            else:
-                room.description = "FREE"
-
-        db.session.commit()
+        rows = (db.session.query(Room, is_busy.label('is_busy'), next_boundary.label('next_boundary'))
+            .order_by(Room.room_id)
+            .limit(per_page)
+            .offset((page - 1) * per_page)
+            .all()
+        )
 
-        total_items = len(all_rooms)
+        # a short page ends the list, so only a full or out-of-range page needs the count
+        if len(rows) < per_page and (rows or page == 1):
+            total_items = (page - 1) * per_page + len(rows)
+        else:
+            total_items = db.session.execute(select(func.count()).select_from(Room)).scalar()
         total_pages = ceil(total_items / per_page)
 
-        return paginated_rooms, total_items, total_pages
+        return [(row.Room, bool(row.is_busy), row.next_boundary) for row in rows], total_items, total_pages
     
     @staticmethod
+    @read_only
     def search_rooms_in_db(page: int, per_page: int, search_name: Optional[str]) -> Tuple[List[Room], int, int]:
         query = Room.query.filter(
             or_(Room.room_name.ilike(f"%{search_name}%")) if search_name else True,
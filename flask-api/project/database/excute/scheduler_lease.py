@@ -0,0 +1,64 @@
+from project.models import SchedulerLease
+from project import db
+from sqlalchemy import DateTime, func, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class seconds_from_now(FunctionElement):
+    """The database clock plus a number of seconds, so every worker compares leases on one clock."""
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(seconds_from_now)
+def _seconds_from_now(element, compiler, **kw):
+    return 'TIMESTAMPADD(SECOND, %s, CURRENT_TIMESTAMP)' % compiler.process(element.clauses, **kw)
+
+
+@compiles(seconds_from_now, 'sqlite')
+def _seconds_from_now_sqlite(element, compiler, **kw):
+    return "datetime('now', %s || ' seconds')" % compiler.process(element.clauses, **kw)
+
+
+class SchedulerLeaseExecutor:
+
+    @staticmethod
+    def try_acquire(name: str, owner: str, ttl_seconds: int) -> bool:
+        # expiry is written and compared with the database's time; worker clocks may drift apart
+        try:
+            result = db.session.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.name == name,
+                    or_(SchedulerLease.owner == owner, SchedulerLease.expires_at < func.now()))
+                .values(owner=owner, expires_at=seconds_from_now(ttl_seconds), heartbeat_at=func.now())
+            )
+            if result.rowcount == 0:
+                if db.session.get(SchedulerLease, name) is not None:
+                    db.session.rollback()
+                    return False
+                db.session.add(SchedulerLease(name=name, owner=owner, expires_at=seconds_from_now(ttl_seconds),
+                                              heartbeat_at=func.now()))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @staticmethod
+    def release(name: str, owner: str) -> None:
+        try:
+            db.session.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == name, SchedulerLease.owner == owner)
+                .values(expires_at=seconds_from_now(-1))
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
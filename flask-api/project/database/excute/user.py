@@ -3,11 +3,17 @@ from project.models.user_has_role import UserHasRole
 from project.models.role import Role
 from project.models.role_has_permission import RoleHasPermission
 from project.models.permission import Permission
-from typing import Optional, Union, List
+from typing import Optional, Union, List, Dict
 from project import db
+from project.database.routing import read_only
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload, selectinload
 
 
 class UserExecutor:
+    @staticmethod
+    def with_roles(query):
+        return query.options(selectinload(User.user_has_role).joinedload(UserHasRole.role))
 
     @staticmethod
     def get_user_by_email(email: str):
@@ -33,6 +39,15 @@ class UserExecutor:
         else:
             return None
 
+    @staticmethod
+    def get_user_emails_by_ids(user_ids: List[int]) -> Dict[int, str]:
+        if not user_ids:
+            return {}
+        users = (db.session.query(User.user_id, User.email)
+            .filter(User.user_id.in_(user_ids), User.is_deleted == False)
+            .all())
+        return {user.user_id: user.email for user in users}
+
     @staticmethod
     def get_user(user_id: int):
         user = User.query.filter_by(user_id=user_id, is_deleted=0).first()
@@ -65,8 +80,28 @@ class UserExecutor:
         return permission_names
 
     @staticmethod
+    def get_permission_names_by_user(user_id: int) -> List[str]:
+        permissions = (
+            db.session.query(Permission.permission_name)
+            .join(RoleHasPermission, Permission.permission_id == RoleHasPermission.permission_id)
+            .join(UserHasRole, RoleHasPermission.role_id == UserHasRole.role_id)
+            .join(User, UserHasRole.user_id == User.user_id)
+            .filter(User.user_id == user_id, User.is_deleted == False)
+            .distinct()
+            .all()
+        )
+        return [permission[0] for permission in permissions]
+
+    @staticmethod
+    def get_role_version(user_id: int) -> Optional[int]:
+        return (db.session.query(User.role_version)
+            .filter(User.user_id == user_id, User.is_deleted == False)
+            .scalar())
+
+    @staticmethod
+    @read_only
     def get_list_users(page: int, per_page: int)-> List[User]:
-        users = User.query.filter_by(is_deleted=False).paginate(
+        users = UserExecutor.with_roles(User.query.filter_by(is_deleted=False)).paginate(
             page=page, per_page=per_page, error_out=False)
         return users
 
@@ -79,7 +114,19 @@ class UserExecutor:
 
     @staticmethod
     def delete_user_role(user_id: int):
-        UserHasRole.query.filter_by(user_id=user_id).delete()
+        for user_role in UserHasRole.query.filter_by(user_id=user_id).all():
+            db.session.delete(user_role)
+
+    @staticmethod
+    def clear_fcm_tokens(fcm_tokens: List[str]) -> int:
+        # own transaction, so pruning never commits or rolls back the caller's session
+        with db.engine.begin() as connection:
+            result = connection.execute(
+                update(User.__table__)
+                .where(User.__table__.c.fcm_token.in_(fcm_tokens))
+                .values(fcm_token=None)
+            )
+        return result.rowcount
 
     @staticmethod
     def add_user(new_user: object):
@@ -100,9 +147,10 @@ class UserExecutor:
         return existing_email
 
     @staticmethod
+    @read_only
     def search_list_user(page: int, per_page: int, search: str) : 
-        users = User.query.filter(User.is_deleted == False).filter(
+        users = UserExecutor.with_roles(User.query.filter(User.is_deleted == False).filter(
             (User.email.like(f'%{search}%')) |
             (User.user_name.like(f'%{search}%'))
-        ).paginate(page=page, per_page=per_page, error_out=False)
+        )).paginate(page=page, per_page=per_page, error_out=False)
         return users
\ No newline at end of file
@@ -0,0 +1,135 @@
+import threading
+import time
+from typing import Dict, Optional
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import Pool, QueuePool
+from project.config import BaseConfig
+
+
+class PoolMetrics:
+    """Process-wide counters for every instrumented connection pool."""
+    _lock = threading.Lock()
+    _checkouts = 0
+    _checked_out = 0
+    _max_checked_out = 0
+    _overflows = 0
+    _timeouts = 0
+    _connects = 0
+    _invalidations = 0
+    _wait_seconds = 0.0
+    _max_wait_seconds = 0.0
+
+    @staticmethod
+    def record_wait(seconds: float, timed_out: bool) -> None:
+        with PoolMetrics._lock:
+            PoolMetrics._wait_seconds += seconds
+            PoolMetrics._max_wait_seconds = max(PoolMetrics._max_wait_seconds, seconds)
+            if timed_out:
+                PoolMetrics._timeouts += 1
+        if has_app_context() and seconds * 1000 >= current_app.config['DB_POOL_SLOW_CHECKOUT_MS']:
+            current_app.logger.warning('Waited %.0f ms for a database connection', seconds * 1000)
+
+    @staticmethod
+    def record_checkout(overflow: bool) -> None:
+        with PoolMetrics._lock:
+            PoolMetrics._checkouts += 1
+            PoolMetrics._checked_out += 1
+            PoolMetrics._max_checked_out = max(PoolMetrics._max_checked_out, PoolMetrics._checked_out)
+            if overflow:
+                PoolMetrics._overflows += 1
+
+    @staticmethod
+    def record_checkin() -> None:
+        with PoolMetrics._lock:
+            PoolMetrics._checked_out = max(PoolMetrics._checked_out - 1, 0)
+
+    @staticmethod
+    def record_connect() -> None:
+        with PoolMetrics._lock:
+            PoolMetrics._connects += 1
+
+    @staticmethod
+    def record_invalidation() -> None:
+        with PoolMetrics._lock:
+            PoolMetrics._invalidations += 1
+
+    @staticmethod
+    def snapshot() -> Dict:
+        with PoolMetrics._lock:
+            checkouts = PoolMetrics._checkouts
+            return {
+                "checkouts": checkouts,
+                "checked_out": PoolMetrics._checked_out,
+                "max_checked_out": PoolMetrics._max_checked_out,
+                "overflows": PoolMetrics._overflows,
+                "timeouts": PoolMetrics._timeouts,
+                "connects": PoolMetrics._connects,
+                "invalidations": PoolMetrics._invalidations,
+                "wait_seconds_total": PoolMetrics._wait_seconds,
+                "wait_seconds_max": PoolMetrics._max_wait_seconds,
+                "wait_seconds_avg": PoolMetrics._wait_seconds / checkouts if checkouts else 0.0,
+            }
+
+    @staticmethod
+    def reset() -> None:
+        with PoolMetrics._lock:
+            PoolMetrics._max_checked_out = PoolMetrics._checked_out
+            PoolMetrics._checkouts = PoolMetrics._overflows = PoolMetrics._timeouts = 0
+            PoolMetrics._connects = PoolMetrics._invalidations = 0
+            PoolMetrics._wait_seconds = PoolMetrics._max_wait_seconds = 0.0
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long callers wait for a free connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except Exception:
+            timed_out = True
+            raise
+        finally:
+            PoolMetrics.record_wait(time.perf_counter() - started, timed_out)
+
+
+def engine_options(uri: Optional[str], config=BaseConfig) -> Dict:
+    options = {
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+    }
+    url = make_url(uri) if uri else None
+    # in-memory SQLite gets a single static connection from Flask-SQLAlchemy
+    if url is not None and url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return options
+    options.update({
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+    })
+    return options
+
+
+@event.listens_for(Pool, 'connect')
+def _connected(dbapi_connection, connection_record):
+    PoolMetrics.record_connect()
+
+
+@event.listens_for(Pool, 'checkout')
+def _checked_out(dbapi_connection, connection_record, connection_proxy):
+    pool = connection_proxy._pool
+    PoolMetrics.record_checkout(isinstance(pool, QueuePool) and pool.checkedout() > pool.size())
+
+
+@event.listens_for(Pool, 'checkin')
+def _checked_in(dbapi_connection, connection_record):
+    PoolMetrics.record_checkin()
+
+
+@event.listens_for(Pool, 'invalidate')
+def _invalidated(dbapi_connection, connection_record, exception):
+    PoolMetrics.record_invalidation()
@@ -0,0 +1,193 @@
+import functools
+import random
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+from flask import Flask, Response, current_app, g, has_app_context, has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session
+from project.config import BaseConfig
+from project.cache.ttl_cache import TTLCache, MISSING
+
+READ_ONLY = 'read_only'
+PRIMARY = 'primary'
+STICKY_COOKIE = 'read_primary_until'
+
+
+def replica_bind_keys(replica_uris: List[str]) -> List[str]:
+    return [f'replica_{index}' for index in range(len(replica_uris))]
+
+
+class ReplicaRouter:
+    """Users who committed a write recently read from the primary until replicas catch up.
+
+    The client carries the deadline in a cookie, so the next request is sticky on any worker;
+    the per-process cache still covers clients that drop cookies.
+    """
+    _recent_writers = TTLCache(maxsize=BaseConfig.REPLICA_STICKY_SIZE, ttl=BaseConfig.REPLICA_STICKY_SECONDS)
+    _unavailable = TTLCache(maxsize=64, ttl=BaseConfig.REPLICA_RETRY_SECONDS)
+    _last_write = 0.0
+
+    @staticmethod
+    def init_app(app: Flask) -> None:
+        ReplicaRouter._recent_writers.configure(
+            app.config['REPLICA_STICKY_SIZE'], app.config['REPLICA_STICKY_SECONDS'])
+        ReplicaRouter._unavailable.configure(64, app.config['REPLICA_RETRY_SECONDS'])
+        app.after_request(ReplicaRouter.set_sticky_cookie)
+
+    @staticmethod
+    def current_user_key() -> Optional[str]:
+        if not has_request_context():
+            return None
+        try:
+            identity = get_jwt_identity()
+        except RuntimeError:
+            return None
+        return None if identity is None else str(identity)
+
+    @staticmethod
+    def mark_write(user_key: Optional[str]) -> None:
+        ReplicaRouter._last_write = time.monotonic()
+        if user_key is not None:
+            ReplicaRouter._recent_writers.set(user_key, True)
+            if has_request_context():
+                g.read_primary_until = (user_key, time.time() + ReplicaRouter._recent_writers.ttl)
+
+    @staticmethod
+    def set_sticky_cookie(response: Response) -> Response:
+        if 'read_primary_until' in g:
+            user_key, until = g.read_primary_until
+            response.set_cookie(STICKY_COOKIE, f'{user_key}:{until:.3f}',
+                                max_age=ReplicaRouter._recent_writers.ttl, httponly=True)
+        return response
+
+    @staticmethod
+    def has_sticky_cookie(user_key: str) -> bool:
+        if not has_request_context():
+            return False
+        cookie_user, _, until = request.cookies.get(STICKY_COOKIE, '').rpartition(':')
+        try:
+            until = float(until)
+        except ValueError:
+            return False
+        now = time.time()
+        # a deadline further out than the window was not set by us
+        return cookie_user == user_key and now < until <= now + ReplicaRouter._recent_writers.ttl
+
+    @staticmethod
+    def wrote_recently() -> bool:
+        return time.monotonic() - ReplicaRouter._last_write < ReplicaRouter._recent_writers.ttl
+
+    @staticmethod
+    def mark_unavailable(bind_key: str) -> None:
+        ReplicaRouter._unavailable.set(bind_key, True)
+
+    @staticmethod
+    def is_available(bind_key: str) -> bool:
+        return ReplicaRouter._unavailable.get(bind_key) is MISSING
+
+    @staticmethod
+    def is_sticky(user_key: Optional[str]) -> bool:
+        if user_key is None:
+            return False
+        return ReplicaRouter._recent_writers.get(user_key) is not MISSING or ReplicaRouter.has_sticky_cookie(user_key)
+
+    @staticmethod
+    def clear() -> None:
+        ReplicaRouter._recent_writers.clear()
+        ReplicaRouter._unavailable.clear()
+        ReplicaRouter._last_write = 0.0
+
+
+class RoutingSession(FlaskSession):
+    """Sends reads marked read-only to one replica per session; everything else goes to the primary."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get(PRIMARY) and self._is_read_only(clause):
+            replica = self._replica()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _is_read_only(self, clause) -> bool:
+        if self.info.get(READ_ONLY, 0) > 0:
+            return True
+        options = getattr(clause, '_execution_options', None)
+        return bool(options and options.get(READ_ONLY))
+
+    def _replica(self):
+        if self.info.get('wrote'):
+            return None
+        if 'replica' not in self.info:
+            keys = [key for key in self._db.engines
+                    if key in replica_bind_keys(current_app.config['SQLALCHEMY_REPLICA_URIS'])
+                    and ReplicaRouter.is_available(key)]
+            if not keys or ReplicaRouter.is_sticky(ReplicaRouter.current_user_key()):
+                self.info['replica'] = None
+            else:
+                self.info['replica'] = random.choice(keys)
+        key = self.info['replica']
+        return None if key is None else self._db.engines[key]
+
+
+def read_only(func):
+    """Runs the executor method's queries on a replica; returned queries keep the routing."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        info = current_app.extensions['sqlalchemy'].session.info
+        info[READ_ONLY] = info.get(READ_ONLY, 0) + 1
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            info[READ_ONLY] -= 1
+        if isinstance(result, Query):
+            result = result.execution_options(**{READ_ONLY: True})
+        return result
+    return wrapper
+
+
+@contextmanager
+def fresh_reads() -> Iterator[None]:
+    """Reads inside go to the primary while replicas may still lag a write committed by this process.
+
+    Process-wide caches refill through it, so a lagging replica's answer is not cached for everyone.
+    """
+    if not ReplicaRouter.wrote_recently():
+        yield
+        return
+    info = current_app.extensions['sqlalchemy'].session.info
+    info[PRIMARY] = info.get(PRIMARY, 0) + 1
+    try:
+        yield
+    finally:
+        info[PRIMARY] -= 1
+
+
+@event.listens_for(Engine, 'handle_error')
+def _connection_failed(context):
+    # a replica that cannot be reached is skipped for REPLICA_RETRY_SECONDS; its reads go to the primary
+    if (context.connection is not None and not context.is_disconnect) or not has_app_context():
+        return
+    for key, engine in current_app.extensions['sqlalchemy'].engines.items():
+        if engine is context.engine and key in replica_bind_keys(current_app.config['SQLALCHEMY_REPLICA_URIS']):
+            ReplicaRouter.mark_unavailable(key)
+
+
+@event.listens_for(Session, 'after_flush')
+def _flushed(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _committed(session):
+    if session.info.get('wrote') and has_app_context() and current_app.config['SQLALCHEMY_REPLICA_URIS']:
+        ReplicaRouter.mark_write(ReplicaRouter.current_user_key())
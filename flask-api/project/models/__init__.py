@@ -7,4 +7,7 @@ from project.models.user_has_role import UserHasRole
 from project.models.permission import Permission
 from project.models.room import Room
 from project.models.booking import Booking
-from project.models.booking_user import BookingUser
\ No newline at end of file
+from project.models.booking_user import BookingUser
+from project.models.scheduler_lease import SchedulerLease
+from project.models.reminder_sent_log import ReminderSentLog
+from project.models.notification_outbox import NotificationOutbox
\ No newline at end of file
@@ -5,6 +5,13 @@ from datetime import datetime
 
 class Booking(db.Model):
     __tablename__ = "booking"
+    __table_args__ = (
+        db.Index('ix_booking_room_active_time', 'room_id', 'is_deleted', 'time_start', 'time_end'),
+        db.Index('ix_booking_active_time_end', 'is_deleted', 'time_end'),
+        db.Index('ix_booking_active_time_start', 'is_deleted', 'time_start'),
+        db.Index('ix_booking_creator', 'creator_id', 'booking_id'),
+        db.Index('ix_booking_pending', 'is_accepted', 'is_deleted', 'booking_id'),
+    )
     booking_id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
     time_start = db.Column(db.TIMESTAMP, nullable=False)
@@ -39,9 +46,12 @@ class Booking(db.Model):
         return None
 
     @staticmethod
-    def validate_time(time_start: str, time_end: str) -> dict[str, str] | None:
-        current_time = str(datetime.now())
-        if time_start >= time_end:
+    def validate_time(time_start: datetime | None, time_end: datetime | None) -> dict[str, str] | None:
+        current_time = datetime.now()
+        if time_start is None or time_end is None:
+            return {"field": "time_start" if time_start is None else "time_end",
+                    "error": "Time must be formatted as YYYY-MM-DD HH:MM:SS"}
+        elif time_start >= time_end:
             return {"field": "time_end", "error": "Time end must be after time start"}
         elif time_start < current_time or time_end < current_time:
             return {"field": "time_start", "error": "Cannot select time in the past"}
@@ -2,6 +2,9 @@ from project.models import db
 
 class BookingUser(db.Model):
     __tablename__ = "booking_user"
+    __table_args__ = (
+        db.Index('ix_booking_user_user_booking', 'user_id', 'booking_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     booking_id = db.Column(db.Integer, db.ForeignKey('booking.booking_id'))
     is_attending = db.Column(db.Boolean, nullable=True)
@@ -0,0 +1,23 @@
+from project.models import db
+from datetime import datetime
+
+class ReminderSentLog(db.Model):
+    __tablename__ = "reminder_sent_log"
+    __table_args__ = (
+        db.UniqueConstraint('booking_id', 'lead_minutes', 'time_start', name='uq_reminder_sent_log_booking_lead_start'),
+        db.Index('ix_reminder_sent_log_time_start', 'time_start'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    booking_id = db.Column(db.Integer, db.ForeignKey('booking.booking_id'), nullable=False)
+    lead_minutes = db.Column(db.Integer, nullable=False)
+    time_start = db.Column(db.DateTime, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'booking_id': self.booking_id,
+            'lead_minutes': self.lead_minutes,
+            'time_start': self.time_start,
+            'sent_at': self.sent_at
+        }
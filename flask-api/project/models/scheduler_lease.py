@@ -0,0 +1,16 @@
+from project.models import db
+
+class SchedulerLease(db.Model):
+    __tablename__ = "scheduler_lease"
+    name = db.Column(db.String(50), primary_key=True)
+    owner = db.Column(db.String(255), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    heartbeat_at = db.Column(db.DateTime, nullable=False)
+
+    def serialize(self):
+        return {
+            'name': self.name,
+            'owner': self.owner,
+            'expires_at': self.expires_at,
+            'heartbeat_at': self.heartbeat_at
+        }
@@ -15,7 +15,8 @@ class User(db.Model):
     created_at = db.Column(db.TIMESTAMP, nullable=False)
     updated_at = db.Column(db.TIMESTAMP, nullable=False)
     is_deleted = db.Column(db.Boolean, nullable=False)
-    fcm_token = db.Column(db.String(255), nullable=True)
+    fcm_token = db.Column(db.String(255), nullable=True, index=True)
+    role_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     booking = db.relationship('Booking', backref='user')
     booking_user = db.relationship('BookingUser', backref='user')
     user_has_role = db.relationship('UserHasRole', backref='user')
@@ -3,53 +3,75 @@ from project.database.excute.user import UserExecutor
 from project.models import Room, Booking, BookingUser, User
 from project.api.common.base_response import BaseResponse
 from werkzeug.exceptions import BadRequest, InternalServerError, Conflict, NotFound, UnprocessableEntity
-from flask import request
+from flask import current_app, request, Response, stream_with_context
 from datetime import datetime, timedelta
 from typing import List
 from project.database.excute.room import RoomExecutor
-from typing import Union, Dict, Optional, List
+from typing import Union, Dict, Optional, List, Iterable
 from math import ceil
 from flask_jwt_extended import get_jwt_identity
-from project import db, app
+from project import db
 from flask_mail import Message
 import os
+import json
 from project.services.email_service import EmailSender
-from project.services.notification_service import PushNotification
+from project.services.outbox_dispatcher import OutboxDispatcher
+from project.cache.booking_interval_index import BookingIntervalIndex
+from project.cache.count_cache import CountCache
+from project.api.common.cursor import Cursor
 
 class BookingService:
 
+    @staticmethod
+    def serialize_booking(booking: Booking) -> Dict:
+        user_ids = [booking_user.user.user_id for booking_user in booking.booking_user]
+        user_names = [booking_user.user.user_name for booking_user in booking.booking_user]
+        booking_users = [booking_user.serialize() for booking_user in booking.booking_user]
+        creator_name = booking.user.user_name if booking.user else None
+        room_name = booking.room.room_name if booking.room else None
+
+        return {
+            "booking_id": booking.booking_id,
+            "title": booking.title,
+            "time_start": booking.time_start.strftime('%Y-%m-%d %H:%M:%S'),
+            "time_end": booking.time_end.strftime('%Y-%m-%d %H:%M:%S'),
+            "room_id": booking.room_id,
+            "room_name": room_name,
+            "user_ids": user_ids,  
+            "user_names": user_names,
+            "creator_id": booking.creator_id,
+            "creator_name": creator_name,
+            "is_accepted":booking.is_accepted,
+            "is_deleted":booking.is_deleted,
+            "booking_users":booking_users
+        }
+
     @staticmethod
     def show_list_booking(bookings: List[Booking]):
-        list_bookings = []
-        for booking in bookings:
-            user_ids = [booking_user.user.user_id for booking_user in booking.booking_user]
-            user_names = [booking_user.user.user_name for booking_user in booking.booking_user]
-            booking_users = [booking_user.serialize() for booking_user in booking.booking_user]
-            user_created= User.query.filter_by(user_id=booking.creator_id).first()
-            creator_name=user_created.user_name if user_created else None
-            room = Room.query.filter_by(room_id=booking.room_id).first()
-            room_name = room.room_name if room else None
-            
-            booking_info = {
-                "booking_id": booking.booking_id,
-                "title": booking.title,
-                "time_start": booking.time_start.strftime('%Y-%m-%d %H:%M:%S'),
-                "time_end": booking.time_end.strftime('%Y-%m-%d %H:%M:%S'),
-                "room_id": booking.room_id,
-                "room_name": room_name,
-                "user_ids": user_ids,  
-                "user_names": user_names,
-                "creator_id": booking.creator_id,
-                "creator_name": creator_name,
-                "is_accepted":booking.is_accepted,
-                "is_deleted":booking.is_deleted,
-                "booking_users":booking_users
-            }
-            list_bookings.append(booking_info) 
-        return list_bookings
+        return [BookingService.serialize_booking(booking) for booking in bookings]
 
     @staticmethod
-    def get_bookings_in_date_range() -> dict:
+    def stream_list_booking(bookings: Iterable[Booking], stream_format: str) -> Response:
+        if stream_format == 'ndjson':
+            def generate():
+                for booking in bookings:
+                    yield json.dumps(BookingService.serialize_booking(booking), ensure_ascii=False) + '\n'
+            mimetype = 'application/x-ndjson'
+        elif stream_format == 'json':
+            def generate():
+                yield '{"status": 200, "message": "Success", "data": ['
+                separator = ''
+                for booking in bookings:
+                    yield separator + json.dumps(BookingService.serialize_booking(booking), ensure_ascii=False)
+                    separator = ','
+                yield ']}'
+            mimetype = 'application/json'
+        else:
+            raise BadRequest("stream must be either 'ndjson' or 'json'.")
+        return Response(stream_with_context(generate()), mimetype=mimetype)
+
+    @staticmethod
+    def get_date_range_from_request():
         start_date_str = request.args.get('start_date', None)
         end_date_str = request.args.get('end_date', None)
 
@@ -58,19 +80,30 @@ class BookingService:
             end_date = datetime.strptime(end_date_str, '%Y-%m-%d') + timedelta(days=1)
         else:
             raise BadRequest("Both start_date and end_date are required for date range query.")
+        return start_date, end_date
 
+    @staticmethod
+    def get_bookings_in_date_range() -> dict:
+        start_date, end_date = BookingService.get_date_range_from_request()
         bookings = BookingExecutor.get_bookings_in_date_range(start_date, end_date)
 
         list_bookings = BookingService.show_list_booking(bookings)
         return list_bookings
 
+    @staticmethod
+    def stream_bookings_in_date_range(stream_format: str) -> Response:
+        start_date, end_date = BookingService.get_date_range_from_request()
+        bookings = BookingExecutor.stream_bookings_in_date_range(
+            start_date, end_date, current_app.config['BOOKING_STREAM_BATCH_SIZE'])
+        return BookingService.stream_list_booking(bookings, stream_format)
+
     @staticmethod
     def book_room(data:  Dict) :
         room_id = data.get('room_id')
         title = data.get('title')
-        time_start= data.get('time_start')
-        time_end= data.get('time_end')
-        user_ids = data.get('user_ids', [])
+        time_start = BookingService.parse_time(data.get('time_start'))
+        time_end = BookingService.parse_time(data.get('time_end'))
+        user_ids = BookingService.parse_user_ids(data.get('user_ids', []))
 
         errors = []
         validate_title = Booking.validate_title(title)
@@ -80,36 +113,70 @@ class BookingService:
         validate_time = Booking.validate_time(time_start, time_end)
         if validate_time:
             errors.append(validate_time)
+
+        user_emails = UserExecutor.get_user_emails_by_ids(user_ids or [])
+        validate_user_ids = BookingService.validate_user_ids(user_ids, user_emails)
+        if validate_user_ids:
+            errors.append(validate_user_ids)
         if errors:
             return BaseResponse.error_validate(errors)
 
-        existing_booking: Optional[Booking] = BookingExecutor.check_room_availability(room_id, time_start, time_end)
-
-        if existing_booking:
+        if BookingIntervalIndex.has_conflict(room_id, time_start, time_end):
             raise Conflict('Room is already booked for this time')
         else:
             new_booking = BookingExecutor.create_booking(room_id, title, time_start, time_end, user_ids)
-            BookingService.send_email_inviting_join_the_meeting(new_booking, user_ids)
+            BookingService.send_email_inviting_join_the_meeting(new_booking, user_ids, user_emails)
+            db.session.commit()
         return BaseResponse.success(message='Booking created successfully')
     
     @staticmethod
-    def send_email_inviting_join_the_meeting(new_booking: Booking, user_ids: List[int]):
-        for user_id in user_ids:
-            user_email = UserExecutor.get_user_email_by_id(user_id)
-            title = new_booking.title
-            time_start = new_booking.time_start
-            time_end = new_booking.time_end
-            room_name = new_booking.room.room_name
-            attendees = [booking_user.user.user_name for booking_user in new_booking.booking_user]
-            EmailSender.send_email_inviting_join_the_meeting(user_email, title, time_start, time_end, room_name, attendees)
+    def parse_time(raw_time) -> datetime | None:
+        # 'YYYY-MM-DD HH:MM:SS' in local time, as the columns store it
+        if not isinstance(raw_time, str):
+            return None
+        try:
+            parsed = datetime.fromisoformat(raw_time)
+        except ValueError:
+            return None
+        return parsed if parsed.tzinfo is None else None
+
+    @staticmethod
+    def parse_user_ids(raw_user_ids) -> List[int] | None:
+        # ids arrive as numbers or numeric strings, but the user lookups are keyed by int
+        if not isinstance(raw_user_ids, list) or any(isinstance(user_id, (bool, float)) for user_id in raw_user_ids):
+            return None
+        try:
+            return list(dict.fromkeys(int(user_id) for user_id in raw_user_ids))
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def validate_user_ids(user_ids: List[int] | None, user_emails: Dict[int, str]) -> dict[str, str] | None:
+        if user_ids is None:
+            return {"field": "user_ids", "error": "User ids must be integers"}
+        missing = [user_id for user_id in user_ids if user_id not in user_emails]
+        if missing:
+            return {"field": "user_ids", "error": f"Users not found: {', '.join(map(str, missing))}"}
+        return None
+
+    @staticmethod
+    def send_email_inviting_join_the_meeting(new_booking: Booking, user_ids: List[int], user_emails: Dict[int, str]):
+        attendees = [booking_user.user.user_name for booking_user in new_booking.booking_user]
+        messages = [
+            EmailSender.build_inviting_join_the_meeting(
+                user_emails[user_id], new_booking.title, new_booking.time_start, new_booking.time_end,
+                new_booking.room.room_name, attendees)
+            for user_id in user_ids if user_id in user_emails
+        ]
+        OutboxDispatcher.enqueue_emails(messages)
         
     @staticmethod
     def update_booking(booking_id: int, data: Dict) -> Union[Dict, None]:
             room_id: int = data.get('room_id')
             title: str = data.get('title')
-            time_start: str = data.get('time_start') 
-            time_end: str = data.get('time_end')
-            user_ids: List[int] = data.get('user_ids', [])
+            time_start: datetime | None = BookingService.parse_time(data.get('time_start'))
+            time_end: datetime | None = BookingService.parse_time(data.get('time_end'))
+            user_ids: List[int] | None = BookingService.parse_user_ids(data.get('user_ids', []))
 
             booking = BookingExecutor.get_booking(booking_id)
 
@@ -125,12 +192,14 @@ class BookingService:
             if validate_time:
                 errors.append(validate_time)
 
+            validate_user_ids = BookingService.validate_user_ids(user_ids, UserExecutor.get_user_emails_by_ids(user_ids or []))
+            if validate_user_ids:
+                errors.append(validate_user_ids)
+
             if errors:
                 return BaseResponse.error_validate(errors)
 
-            existing_booking = BookingExecutor.check_room_availability_update(room_id, time_start, time_end, booking_id)
-
-            if existing_booking:
+            if BookingIntervalIndex.has_conflict(room_id, time_start, time_end, booking_id):
                 raise Conflict('Room is already booked for this time')
 
             BookingExecutor.update_booking(booking, room_id, title, time_start, time_end, user_ids,)
@@ -160,6 +229,13 @@ class BookingService:
     
     @staticmethod
     def search_booking_users(start_date: str, end_date: str ,user_ids: List[int] ) -> List[Booking]:
+        if not start_date or not end_date:
+            raise BadRequest("Both start_date and end_date are required for date range query.")
+        try:
+            start_date = datetime.strptime(start_date, '%Y-%m-%d')
+            end_date = datetime.strptime(end_date, '%Y-%m-%d')
+        except ValueError:
+            raise BadRequest("Invalid date format. Use YYYY-MM-DD.")
         bookings = BookingExecutor.search_booking_users(start_date, end_date, user_ids)
         list_bookings = BookingService.show_list_booking(bookings)
         return list_bookings
@@ -182,27 +258,27 @@ class BookingService:
     
     @staticmethod
     def get_bookings_in_date_range_user() -> dict:
-        user_id = get_jwt_identity()
-        start_date_str = request.args.get('start_date', None)
-        end_date_str = request.args.get('end_date', None)
-
-        if start_date_str and end_date_str:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d') + timedelta(days=1)
-        else:
-            raise BadRequest("Both start_date and end_date are required for date range query.")
-
+        user_id = int(get_jwt_identity())
+        start_date, end_date = BookingService.get_date_range_from_request()
         bookings = BookingExecutor.get_bookings_in_date_range_user(start_date, end_date, user_id)
         list_bookings = BookingService.show_list_booking(bookings)
         return list_bookings
+
+    @staticmethod
+    def stream_bookings_in_date_range_user(stream_format: str) -> Response:
+        user_id = int(get_jwt_identity())
+        start_date, end_date = BookingService.get_date_range_from_request()
+        bookings = BookingExecutor.stream_bookings_in_date_range_user(
+            start_date, end_date, user_id, current_app.config['BOOKING_STREAM_BATCH_SIZE'])
+        return BookingService.stream_list_booking(bookings, stream_format)
     
     @staticmethod
     def book_room_belong_to_user(data:  Dict) :
         room_id = data.get('room_id')
         title = data.get('title')
-        time_start= data.get('time_start')
-        time_end= data.get('time_end')
-        user_ids = data.get('user_ids', [])
+        time_start = BookingService.parse_time(data.get('time_start'))
+        time_end = BookingService.parse_time(data.get('time_end'))
+        user_ids = BookingService.parse_user_ids(data.get('user_ids', []))
 
         errors = []
         validate_title = Booking.validate_title(title)
@@ -212,12 +288,14 @@ class BookingService:
         validate_time = Booking.validate_time(time_start, time_end)
         if validate_time:
             errors.append(validate_time)
+
+        validate_user_ids = BookingService.validate_user_ids(user_ids, UserExecutor.get_user_emails_by_ids(user_ids or []))
+        if validate_user_ids:
+            errors.append(validate_user_ids)
         if errors:
             return BaseResponse.error_validate(errors)
 
-        existing_booking: Optional[Booking] = BookingExecutor.check_room_availability(room_id, time_start, time_end)
-
-        if existing_booking:
+        if BookingIntervalIndex.has_conflict(room_id, time_start, time_end):
             raise Conflict('Room is already booked for this time')
         
         new_booking = BookingExecutor.create_booking_belong_to_user(room_id, title, time_start, time_end, user_ids)
@@ -226,17 +304,41 @@ class BookingService:
             raise NotFound('Admins not found')
         creator=UserExecutor.get_user(user_id=new_booking.creator_id)
         
-        for admin in admins:
-            if admin.fcm_token:
-                PushNotification.send_notification_reminder(
-                            fcm_token=admin.fcm_token,
-                            message_title="Meeting pending",
-                            message_body=f"There is a meeting schedule set by {creator.user_name}")
+        OutboxDispatcher.enqueue_push(
+            fcm_tokens=[admin.fcm_token for admin in admins],
+            message_title="Meeting pending",
+            message_body=f"There is a meeting schedule set by {creator.user_name}")
+        db.session.commit()
         return BaseResponse.success('Booking created successfully')
 
     @staticmethod
-    def user_view_list_booked(page: int, per_page: int) -> List[Booking]:
-        creator_id=get_jwt_identity()
+    def check_per_page(per_page: int) -> None:
+        max_per_page = current_app.config['MAX_PER_PAGE']
+        if not 1 <= per_page <= max_per_page:
+            raise BadRequest(f"per_page must be between 1 and {max_per_page}.")
+
+    @staticmethod
+    def cursor_page(query, cursor: str, per_page: int, count_key: tuple, with_count: bool) -> Dict:
+        bookings = BookingExecutor.keyset_bookings(query, Cursor.decode(cursor), per_page + 1)
+        has_more = len(bookings) > per_page
+        bookings = bookings[:per_page]
+        result = {
+            'list_bookings': BookingService.show_list_booking(bookings),
+            'per_page': per_page,
+            'next_cursor': Cursor.encode(bookings[-1].booking_id) if has_more else None
+        }
+        if with_count:
+            result['total_items'] = CountCache.get_or_compute(
+                count_key, lambda: BookingExecutor.count_bookings(query))
+        return result
+
+    @staticmethod
+    def user_view_list_booked(page: int, per_page: int, cursor: Optional[str] = None, with_count: bool = False) -> List[Booking]:
+        BookingService.check_per_page(per_page)
+        creator_id=int(get_jwt_identity())
+        if cursor is not None:
+            return BookingService.cursor_page(BookingExecutor.user_booked_query(creator_id), cursor, per_page,
+                                              ('user_view_list_booked', creator_id), with_count)
         bookings=BookingExecutor.user_view_list_booked(page, per_page, creator_id)
         list_bookings = BookingService.show_list_booking(bookings)   
         total_items = bookings.total
@@ -253,7 +355,11 @@ class BookingService:
         return result
     
     @staticmethod
-    def admin_view_booking_pending(page: int, per_page: int) -> List[Booking]:
+    def admin_view_booking_pending(page: int, per_page: int, cursor: Optional[str] = None, with_count: bool = False) -> List[Booking]:
+        BookingService.check_per_page(per_page)
+        if cursor is not None:
+            return BookingService.cursor_page(BookingExecutor.booking_pending_query(), cursor, per_page,
+                                              ('admin_view_booking_pending',), with_count)
         bookings=BookingExecutor.admin_view_booking_pending(page, per_page)
         list_bookings=BookingService.show_list_booking(bookings)  
         total_items = bookings.total
@@ -312,8 +418,8 @@ class BookingService:
             if booking.creator_id:
                 user = UserExecutor.get_user(user_id=booking.creator_id)
                 if user and user.fcm_token:
-                    PushNotification.send_notification_reminder(
-                        fcm_token=user.fcm_token,
+                    OutboxDispatcher.enqueue_push(
+                        fcm_tokens=[user.fcm_token],
                         message_title="Booking Accepted",
                         message_body=f"The booking '{booking.title}' scheduled for {booking.time_start} - {booking.time_end} has been accepted."
                     )
@@ -329,18 +435,19 @@ class BookingService:
         
     @staticmethod
     def send_email_accepting_the_scheduled(booking: Booking, user_ids: List[int]):
+        user_emails = UserExecutor.get_user_emails_by_ids(user_ids)
+        attendees = [booking_user.user.user_name for booking_user in booking.booking_user]
+        messages = []
         for user_id in user_ids:
-            user_email = UserExecutor.get_user_email_by_id(user_id)
-            title = booking.title
-            time_start = booking.time_start
-            time_end = booking.time_end
-            room_name = booking.room.room_name 
-            attendees = [booking_user.user.user_name for booking_user in booking.booking_user]
-            
+            if user_id not in user_emails:
+                continue
             if user_id == booking.creator_id:
-                EmailSender.send_email_accepting_the_scheduled(user_email, title, time_start, time_end, room_name, attendees)
+                build = EmailSender.build_accepting_the_scheduled
             else:
-                EmailSender.send_email_inviting_join_the_meeting(user_email, title, time_start, time_end, room_name, attendees)        
+                build = EmailSender.build_inviting_join_the_meeting
+            messages.append(build(user_emails[user_id], booking.title, booking.time_start, booking.time_end,
+                                  booking.room.room_name, attendees))
+        OutboxDispatcher.enqueue_emails(messages)
     
     @staticmethod
     def reject_booking(booking_id: int):
@@ -355,8 +462,8 @@ class BookingService:
             if booking.creator_id:
                 user = UserExecutor.get_user(user_id=booking.creator_id)
                 if user and user.fcm_token:
-                    PushNotification.send_notification_reminder(
-                        fcm_token=user.fcm_token,
+                    OutboxDispatcher.enqueue_push(
+                        fcm_tokens=[user.fcm_token],
                         message_title="Booking Rejected",
                         message_body=f"The booking '{booking.title}' scheduled for {booking.time_start} - {booking.time_end} has been rejected."
                     )
@@ -373,38 +480,40 @@ class BookingService:
         
     @staticmethod
     def send_email_rejecting_the_scheduled(booking: Booking, user_ids: List[int]):
-        for user_id in user_ids:
-            user_email = UserExecutor.get_user_email_by_id(user_id)
-            title = booking.title
-            time_start = booking.time_start
-            time_end = booking.time_end
-            room_name = booking.room.room_name 
-            attendees = [booking_user.user.user_name for booking_user in booking.booking_user]
-            
-            if user_id == booking.creator_id:
-                EmailSender.send_email_rejecting_the_scheduled(user_email, title, time_start, time_end, room_name, attendees)     
+        if booking.creator_id not in user_ids:
+            return
+        user_email = UserExecutor.get_user_email_by_id(booking.creator_id)
+        if not user_email:
+            return
+        attendees = [booking_user.user.user_name for booking_user in booking.booking_user]
+        OutboxDispatcher.enqueue_emails([EmailSender.build_rejecting_the_scheduled(
+            user_email, booking.title, booking.time_start, booking.time_end, booking.room.room_name, attendees)])
     
     @staticmethod
-    def view_list_invite(page: int, per_page: int) -> list[Booking]:
-        user_id=get_jwt_identity()
+    def view_list_invite(page: int, per_page: int, cursor: Optional[str] = None, with_count: bool = False) -> list[Booking]:
+        BookingService.check_per_page(per_page)
+        user_id=int(get_jwt_identity())
+        if cursor is not None:
+            return BookingService.cursor_page(BookingExecutor.list_invite_query(user_id), cursor, per_page,
+                                              ('view_list_invite', user_id), with_count)
         bookings=BookingExecutor.view_list_invite(page,per_page,user_id)
         list_booking_invite=BookingService.show_list_booking(bookings)
         return list_booking_invite
     
     @staticmethod
     def user_confirm_booking(booking_id: int):
-        user_id = get_jwt_identity()
+        user_id = int(get_jwt_identity())
         booking_user = BookingExecutor.get_booking_user(booking_id, user_id)
         try:
             booking_user.is_attending = True
-            db.session.commit()
             booking = BookingExecutor.get_booking(booking_id)
             creator=UserExecutor.get_user(user_id=booking.creator_id)
             if creator.fcm_token:
-                PushNotification.send_notification_reminder(
-                            fcm_token=creator.fcm_token,
+                OutboxDispatcher.enqueue_push(
+                            fcm_tokens=[creator.fcm_token],
                             message_title="Invitation confirme",
                             message_body=f"{creator.user_name} confirm participation in meeting schedule")
+            db.session.commit()
             return BaseResponse.success('Invitation successfully confirmed')
 
         except Exception as e:
@@ -413,20 +522,19 @@ class BookingService:
         
     @staticmethod
     def user_decline_booking(booking_id: int):
-        user_id = get_jwt_identity()
+        user_id = int(get_jwt_identity())
         booking_user = BookingExecutor.get_booking_user(booking_id, user_id)
         try:
             booking_user.is_attending = False
-
-            db.session.commit()
             booking = BookingExecutor.get_booking(booking_id)
             creator=UserExecutor.get_user(user_id=booking.creator_id)
             if creator.fcm_token:
-                PushNotification.send_notification_reminder(
-                            fcm_token=creator.fcm_token,
+                OutboxDispatcher.enqueue_push(
+                            fcm_tokens=[creator.fcm_token],
                             message_title="Invitation confirme",
                             message_body=f"{creator.user_name} decline participation in meeting schedule"
                         )
+            db.session.commit()
             return BaseResponse.success('Invitation successfully declined')
         except Exception as e:
             db.session.rollback()
@@ -1,66 +1,66 @@
 from flask_mail import Message
 import os
-from project import mail, app, celery
-from project.api.common.base_response import BaseResponse
-import smtplib
-from project.database.excute.room import RoomExecutor
+from flask import current_app
+from project import celery
+from typing import Dict, List
 from project.models import User, Booking
+from project.services.mail_transport import MailTransport
 
 
 class EmailSender:
-    @celery.task
-    def send_email_inviting_join_the_meeting(user_email, title, time_start, time_end, room_name, attendees):
-        try:
-                msg = Message(f'[LỜI MỜI THAM GIA]: {title}', sender=os.getenv('MAIL_USERNAME'), recipients=[user_email])
-                msg.body = f'Thông báo cuộc họp\n\n' \
-                           f'Phòng họp: {room_name}\n' \
-                           f'Thời gian: {time_start} - {time_end}\n' \
-                           f'Người tham gia:\n{",\n".join(attendees)}\n\n' \
-                           f'Bạn được thêm vào tham gia cuộc họp. Vào trang lời mời tham gia cuộc họp của mình để xác nhận tham gia.'
-                mail.send(msg)
-                
-        except smtplib.SMTPException as e:
-            return BaseResponse.error(e)
-        
-    @celery.task
-    def send_email_accepting_the_scheduled(user_email, title, time_start, time_end, room_name, attendees):
-        try:
-                msg = Message(f'[XÁC NHẬN]: {title}', sender=os.getenv('MAIL_USERNAME'), recipients=[user_email])
-                msg.body = f'Cuộc họp bạn đặt đã được chấp nhận!\n\n' \
-                           f'Phòng họp: {room_name}\n' \
-                           f'Thời gian: {time_start} - {time_end}\n' \
-                           f'Người tham gia:\n{",\n".join(attendees)}' 
-                mail.send(msg)
+    @staticmethod
+    def build_message(subject: str, user_email: str, body: str) -> Dict:
+        return {"subject": subject, "recipients": [user_email], "body": body}
 
-        except smtplib.SMTPException as e:
-            return BaseResponse.error(e)
-        
-    @celery.task
-    def send_email_rejecting_the_scheduled(user_email, title, time_start, time_end, room_name, attendees):
-        try:
-                msg = Message(f'[TỪ CHỐI]: {title}', sender=os.getenv('MAIL_USERNAME'), recipients=[user_email])
-                msg.body = f'Cuộc họp bạn đặt đã bị từ chối!\n\n' \
-                           f'Phòng họp: {room_name}\n' \
-                           f'Thời gian: {time_start} - {time_end}\n' \
-                           f'Người tham gia:\n{",\n".join(attendees)}' 
-                mail.send(msg)
+    @staticmethod
+    def build_inviting_join_the_meeting(user_email, title, time_start, time_end, room_name, attendees) -> Dict:
+        attendee_list = ",\n".join(attendees)
+        return EmailSender.build_message(
+            f'[LỜI MỜI THAM GIA]: {title}', user_email,
+            f'Thông báo cuộc họp\n\n'
+            f'Phòng họp: {room_name}\n'
+            f'Thời gian: {time_start} - {time_end}\n'
+            f'Người tham gia:\n{attendee_list}\n\n'
+            f'Bạn được thêm vào tham gia cuộc họp. Vào trang lời mời tham gia cuộc họp của mình để xác nhận tham gia.')
 
-        except smtplib.SMTPException as e:
-            return BaseResponse.error(e)
-    
     @staticmethod
-    def send_mail_reminder(booking: Booking, user: User):
-        try:
-            with app.app_context():
-                attendees=[booking_user.user.user_name for booking_user in booking.booking_user]
-                room= RoomExecutor.get_room_by_id(booking.room_id)
-                msg = Message(f'[THÔNG BÁO]: {booking.title}', sender=os.getenv('MAIL_USERNAME'), recipients=[user.email])
-                msg.body = f'Thông báo cuộc họp\n\n' \
-                           f'Cuộc họp còn 10 phút nữa sẽ bắt đầu!\n\n' \
-                           f'Phòng họp: {room.room_name}\n' \
-                           f'Thời gian: {booking.time_start} - {booking.time_end}\n' \
-                           f'Người tham gia:\n{",\n".join(attendees)}' 
-                mail.send(msg)
-                
-        except smtplib.SMTPException as e:
-            return BaseResponse.error(e)
\ No newline at end of file
+    def build_accepting_the_scheduled(user_email, title, time_start, time_end, room_name, attendees) -> Dict:
+        attendee_list = ",\n".join(attendees)
+        return EmailSender.build_message(
+            f'[XÁC NHẬN]: {title}', user_email,
+            f'Cuộc họp bạn đặt đã được chấp nhận!\n\n'
+            f'Phòng họp: {room_name}\n'
+            f'Thời gian: {time_start} - {time_end}\n'
+            f'Người tham gia:\n{attendee_list}')
+
+    @staticmethod
+    def build_rejecting_the_scheduled(user_email, title, time_start, time_end, room_name, attendees) -> Dict:
+        attendee_list = ",\n".join(attendees)
+        return EmailSender.build_message(
+            f'[TỪ CHỐI]: {title}', user_email,
+            f'Cuộc họp bạn đặt đã bị từ chối!\n\n'
+            f'Phòng họp: {room_name}\n'
+            f'Thời gian: {time_start} - {time_end}\n'
+            f'Người tham gia:\n{attendee_list}')
+
+    @staticmethod
+    def build_reminder(booking: Booking, user: User, lead_minutes: int = 10) -> Dict:
+        attendee_list = ",\n".join(booking_user.user.user_name for booking_user in booking.booking_user)
+        return EmailSender.build_message(
+            f'[THÔNG BÁO]: {booking.title}', user.email,
+            f'Thông báo cuộc họp\n\n'
+            f'Cuộc họp còn {lead_minutes} phút nữa sẽ bắt đầu!\n\n'
+            f'Phòng họp: {booking.room.room_name}\n'
+            f'Thời gian: {booking.time_start} - {booking.time_end}\n'
+            f'Người tham gia:\n{attendee_list}')
+
+    @celery.task
+    def send_messages(messages: List[Dict]) -> List[Dict]:
+        failures = MailTransport.send_many([
+            Message(message["subject"], sender=os.getenv('MAIL_USERNAME'),
+                    recipients=message["recipients"], body=message["body"])
+            for message in messages
+        ])
+        for failure in failures:
+            current_app.logger.error('Could not send email to %s: %s', failure["recipient"], failure["error"])
+        return failures
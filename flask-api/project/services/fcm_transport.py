@@ -0,0 +1,134 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Mapping, Optional
+import requests
+from google.auth.exceptions import GoogleAuthError
+from google.auth.transport.requests import AuthorizedSession
+from google.oauth2 import service_account
+from requests.adapters import HTTPAdapter
+from project.services.metrics import Metrics
+
+
+class FCMTransport:
+    """Sends through the FCM HTTP v1 API: one messages:send request per token over a keep-alive session.
+
+    At most `workers` requests are in flight and at most `max_per_second` start each second, across
+    every caller in the process. A 429 or 503 pauses sending for its Retry-After, or for an
+    exponential back-off, and tokens due during the pause come back as retryable without a request.
+    """
+    END_POINT = 'https://fcm.googleapis.com/v1/projects/{project_id}/messages:send'
+    SCOPES = ['https://www.googleapis.com/auth/firebase.messaging']
+    RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+    THROTTLE_STATUS = (429, 503)
+
+    def __init__(self, end_point: str, session: requests.Session, workers: int, timeout: float,
+                 max_per_second: float = 0, backoff_seconds: float = 1, backoff_max_seconds: float = 60):
+        self.end_point = end_point
+        self.session = session
+        self.timeout = timeout
+        self.max_per_second = max_per_second
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+        self._pause_error = None
+        self._throttles = 0
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fcm')
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+    @staticmethod
+    def from_config(config: Mapping) -> 'FCMTransport':
+        # FCM_END_POINT replaces the Google endpoint with a local stand-in, which needs no credentials
+        project_id = config['FCM_PROJECT_ID']
+        if config['FIREBASE_ADMIN_SDK']:
+            credentials = service_account.Credentials.from_service_account_file(
+                config['FIREBASE_ADMIN_SDK'], scopes=FCMTransport.SCOPES)
+            project_id = project_id or credentials.project_id
+            session = AuthorizedSession(credentials)
+        elif config['FCM_END_POINT']:
+            session = requests.Session()
+        else:
+            raise ValueError('FIREBASE_ADMIN_SDK must point at a service account file to send push notifications')
+        end_point = config['FCM_END_POINT'] or FCMTransport.END_POINT.format(project_id=project_id)
+        return FCMTransport(end_point, session, config['FCM_CONCURRENCY'], config['FCM_TIMEOUT_SECONDS'],
+                            config['FCM_MAX_SENDS_PER_SECOND'], config['FCM_BACKOFF_SECONDS'],
+                            config['FCM_BACKOFF_MAX_SECONDS'])
+
+    @staticmethod
+    def error_fields(response: requests.Response) -> List[str]:
+        # google.rpc.BadRequest details name the request fields an INVALID_ARGUMENT refers to
+        try:
+            details = response.json()['error'].get('details', [])
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return []
+        return [violation.get('field') for detail in details if detail.get('@type', '').endswith('BadRequest')
+                for violation in detail.get('fieldViolations', [])]
+
+    @staticmethod
+    def error_code(response: requests.Response) -> str:
+        try:
+            error = response.json()['error']
+        except (ValueError, KeyError, TypeError):
+            return f'HTTP {response.status_code}'
+        for detail in error.get('details', []):
+            if detail.get('@type', '').endswith('FcmError') and detail.get('errorCode'):
+                return detail['errorCode']
+        return error.get('status') or f'HTTP {response.status_code}'
+
+    def _wait_for_slot(self) -> Optional[Dict]:
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return {'error': self._pause_error, 'retry': True}
+            delay = 0.0
+            if self.max_per_second:
+                slot = max(now, self._next_slot)
+                self._next_slot = slot + 1 / self.max_per_second
+                delay = slot - now
+        if delay:
+            time.sleep(delay)
+        return None
+
+    def _back_off(self, error: str, retry_after: Optional[str]) -> None:
+        with self._lock:
+            self._throttles += 1
+            try:
+                seconds = float(retry_after)
+            except (TypeError, ValueError):
+                seconds = min(self.backoff_seconds * 2 ** (self._throttles - 1), self.backoff_max_seconds)
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._pause_error = error
+
+    def send(self, token: str, message_title: str, message_body: str) -> Dict:
+        paused = self._wait_for_slot()
+        if paused is not None:
+            return paused
+        message = {'message': {'token': token, 'notification': {'title': message_title, 'body': message_body}}}
+        try:
+            with Metrics.time_external('fcm'):
+                response = self.session.post(self.end_point, json=message, timeout=self.timeout)
+        except (requests.RequestException, GoogleAuthError) as e:
+            return {'error': type(e).__name__, 'retry': True}
+        if response.ok:
+            self._throttles = 0
+            return {'message_id': response.json().get('name')}
+        error = FCMTransport.error_code(response)
+        if response.status_code in FCMTransport.THROTTLE_STATUS:
+            self._back_off(error, response.headers.get('Retry-After'))
+        result = {'error': error, 'retry': response.status_code in FCMTransport.RETRYABLE_STATUS}
+        fields = FCMTransport.error_fields(response)
+        if fields:
+            result['fields'] = fields
+        return result
+
+    def send_many(self, tokens: List[str], message_title: str, message_body: str) -> Dict[str, Dict]:
+        results = self.executor.map(lambda token: self.send(token, message_title, message_body), tokens)
+        return dict(zip(tokens, results))
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        self.session.close()
@@ -1,8 +1,9 @@
 from project.database.excute.user import UserExecutor
 from datetime import timedelta
 from werkzeug.exceptions import BadRequest, Unauthorized
-from project.config import BaseConfig
+from flask import current_app
 from flask_jwt_extended import create_access_token
+from project.cache.permission_cache import PermissionCache
 from project import db
 
 class AuthService:
@@ -20,8 +21,13 @@ class AuthService:
 
     @staticmethod
     def login_user(user: object):
+        # read from the database, not the cache, so a token never carries permissions older than its stamp
+        role_version = UserExecutor.get_role_version(user.user_id)
+        permissions = UserExecutor.get_permission_names_by_user(user.user_id)
+        PermissionCache.remember_role_version(user.user_id, role_version)
         access_token = create_access_token(
-            identity=user.user_id, expires_delta=timedelta(days=int(BaseConfig.TOKEN_EXPIRATION_DAYS)))
+            identity=str(user.user_id), expires_delta=timedelta(days=int(current_app.config['TOKEN_EXPIRATION_DAYS'])),
+            additional_claims={"permissions": sorted(permissions), "role_version": role_version})
         role_name = UserExecutor.get_role_names(user.user_id)
         user_name = user.user_name
         access_token = access_token
@@ -0,0 +1,124 @@
+import smtplib
+import threading
+import time
+from typing import Dict, List
+from flask import current_app
+from flask_mail import Connection, Message
+from project import mail
+from project.services.metrics import Metrics
+
+
+class PooledConnection:
+    def __init__(self, connection: Connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    def is_usable(self) -> bool:
+        now = time.monotonic()
+        if now - self.created_at > current_app.config['MAIL_CONNECTION_MAX_AGE']:
+            return False
+        if now - self.last_used > current_app.config['MAIL_CONNECTION_MAX_IDLE']:
+            return False
+        if self.connection.host is None:
+            return True
+        try:
+            return self.connection.host.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+
+class MailTransport:
+    _idle: List[PooledConnection] = []
+    _lock = threading.Lock()
+
+    @staticmethod
+    def open() -> PooledConnection:
+        connection = mail.connect()
+        with Metrics.time_external('smtp_connect'):
+            connection.__enter__()
+        return PooledConnection(connection)
+
+    @staticmethod
+    def close(pooled: PooledConnection) -> None:
+        try:
+            pooled.connection.__exit__(None, None, None)
+        except (smtplib.SMTPException, OSError):
+            pass
+
+    @staticmethod
+    def acquire() -> PooledConnection:
+        while True:
+            with MailTransport._lock:
+                pooled = MailTransport._idle.pop() if MailTransport._idle else None
+            if pooled is None:
+                return MailTransport.open()
+            if pooled.is_usable():
+                return pooled
+            MailTransport.close(pooled)
+
+    @staticmethod
+    def release(pooled: PooledConnection) -> None:
+        pooled.last_used = time.monotonic()
+        with MailTransport._lock:
+            if len(MailTransport._idle) < current_app.config['MAIL_POOL_SIZE']:
+                MailTransport._idle.append(pooled)
+                return
+        MailTransport.close(pooled)
+
+    @staticmethod
+    def clear() -> None:
+        with MailTransport._lock:
+            idle, MailTransport._idle = MailTransport._idle, []
+        for pooled in idle:
+            MailTransport.close(pooled)
+
+    @staticmethod
+    def failures_for(message: Message, error: Exception) -> List[Dict]:
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return [{"recipient": recipient, "error": str(reason)}
+                    for recipient, reason in error.recipients.items()]
+        return [{"recipient": recipient, "error": str(error)} for recipient in message.send_to]
+
+    @staticmethod
+    def send_many(messages: List[Message]) -> List[Dict]:
+        failures = []
+        index = 0
+        while index < len(messages):
+            try:
+                pooled = MailTransport.acquire()
+            except (smtplib.SMTPException, OSError) as e:
+                for message in messages[index:]:
+                    failures.extend(MailTransport.failures_for(message, e))
+                break
+
+            batch_end = min(index + current_app.config['MAIL_BATCH_SIZE'], len(messages))
+            deadline = time.monotonic() + current_app.config['MAIL_BATCH_MAX_SECONDS']
+            while index < batch_end and time.monotonic() < deadline:
+                message = messages[index]
+                index += 1
+                try:
+                    pooled = MailTransport.send_one(pooled, message)
+                except smtplib.SMTPRecipientsRefused as e:
+                    failures.extend(MailTransport.failures_for(message, e))
+                except (smtplib.SMTPException, OSError) as e:
+                    failures.extend(MailTransport.failures_for(message, e))
+                    MailTransport.close(pooled)
+                    pooled = None
+                    break
+
+            if pooled is not None:
+                MailTransport.release(pooled)
+        return failures
+
+    @staticmethod
+    def send_one(pooled: PooledConnection, message: Message) -> PooledConnection:
+        try:
+            with Metrics.time_external('smtp'):
+                pooled.connection.send(message)
+        except smtplib.SMTPServerDisconnected:
+            MailTransport.close(pooled)
+            pooled = MailTransport.open()
+            with Metrics.time_external('smtp'):
+                pooled.connection.send(message)
+        return pooled
@@ -0,0 +1,176 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from flask import Flask, Response, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def format_labels(names: Tuple[str, ...], values: Tuple) -> str:
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values, rendered in Prometheus text format."""
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        self._series: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series = {}
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        bounds = [repr(bound) for bound in self.buckets] + ['+Inf']
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                bucket_labels = format_labels(self.labels + ('le',), labels + (bound,))
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            label_text = format_labels(self.labels, labels)
+            lines.append(f'{self.name}_sum{label_text} {total}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+class RequestStats:
+    __slots__ = ('queries', 'sql_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+
+class Metrics:
+    SKIP_ENDPOINTS = ('metrics_controller.get_metrics', 'static')
+    request_seconds = Histogram(
+        'http_request_duration_seconds', 'Request latency, including streamed bodies.',
+        ('endpoint', 'method', 'status'), LATENCY_BUCKETS)
+    request_queries = Histogram(
+        'http_request_sql_queries', 'SQL statements executed per request.',
+        ('endpoint', 'method'), QUERY_COUNT_BUCKETS)
+    request_sql_seconds = Histogram(
+        'http_request_sql_duration_seconds', 'Time spent executing SQL per request.',
+        ('endpoint', 'method'), LATENCY_BUCKETS)
+    external_seconds = Histogram(
+        'external_call_duration_seconds', 'Calls to SMTP and FCM.',
+        ('service', 'outcome'), LATENCY_BUCKETS)
+
+    @staticmethod
+    def init_app(app: Flask) -> None:
+        app.before_request(Metrics._start_request)
+        app.after_request(Metrics._finish_request)
+
+    @staticmethod
+    def _start_request() -> None:
+        g.request_stats = RequestStats()
+        g.request_started = time.perf_counter()
+
+    @staticmethod
+    def _finish_request(response: Response) -> Response:
+        stats = g.get('request_stats')
+        if stats is None or request.endpoint in Metrics.SKIP_ENDPOINTS:
+            return response
+        started = g.request_started
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        method = request.method
+        status = response.status_code
+
+        def record():
+            Metrics.request_seconds.observe((endpoint, method, status), time.perf_counter() - started)
+            Metrics.request_queries.observe((endpoint, method), stats.queries)
+            Metrics.request_sql_seconds.observe((endpoint, method), stats.sql_seconds)
+
+        # streamed bodies keep running queries after this hook, so record once the response closes
+        if response.is_streamed:
+            response.call_on_close(record)
+        else:
+            record()
+        return response
+
+    @staticmethod
+    def current_stats() -> Optional[RequestStats]:
+        return g.get('request_stats') if has_app_context() else None
+
+    @staticmethod
+    @contextmanager
+    def time_external(service: str) -> Iterator[None]:
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            yield
+            outcome = 'ok'
+        finally:
+            Metrics.external_seconds.observe((service, outcome), time.perf_counter() - started)
+
+    @staticmethod
+    def render_value(name: str, kind: str, description: str, values: Dict[Tuple, float],
+                     labels: Tuple[str, ...] = ()) -> List[str]:
+        lines = [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+        for label_values, value in sorted(values.items()):
+            lines.append(f'{name}{format_labels(labels, label_values)} {value}')
+        return lines
+
+    @staticmethod
+    def render() -> List[str]:
+        lines = []
+        for histogram in (Metrics.request_seconds, Metrics.request_queries,
+                          Metrics.request_sql_seconds, Metrics.external_seconds):
+            lines.extend(histogram.render())
+        return lines
+
+    @staticmethod
+    def clear() -> None:
+        for histogram in (Metrics.request_seconds, Metrics.request_queries,
+                          Metrics.request_sql_seconds, Metrics.external_seconds):
+            histogram.clear()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['metrics_started'].pop()
+    stats = Metrics.current_stats()
+    if stats is not None:
+        stats.queries += 1
+        stats.sql_seconds += time.perf_counter() - started
+
+
+@event.listens_for(Engine, 'handle_error')
+def _cursor_failed(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('metrics_started'):
+        connection.info['metrics_started'].pop()
@@ -1,38 +1,70 @@
 from flask_mail import Message
-import requests
-from project import mail, app, celery, push_service, scheduler
+import threading
+from flask import current_app
+from google.auth.exceptions import GoogleAuthError
+from project import mail, celery
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Dict, List
+from project.config import BaseConfig
 from werkzeug.exceptions import InternalServerError
 from project.api.common.base_response import BaseResponse
 from project.database.excute.room import RoomExecutor
-from project.database.excute.booking import BookingExecutor
-from datetime import datetime, timedelta
-from project.services.email_service import EmailSender
+from project.database.excute.user import UserExecutor
+from project.services.fcm_transport import FCMTransport
 
 
 class PushNotification:
+    # INVALID_ARGUMENT also covers bad payloads, so it only condemns the token when FCM names the token field
+    DEAD_TOKEN_ERRORS = ('UNREGISTERED',)
+    TOKEN_FIELD = 'message.token'
+    _counters = {'sent': 0, 'failed': 0, 'pruned_tokens': 0}
+    _lock = threading.Lock()
+    _push_service = None
+
+    @staticmethod
+    def push_service() -> FCMTransport:
+        with PushNotification._lock:
+            if PushNotification._push_service is None:
+                PushNotification._push_service = FCMTransport.from_config(current_app.config)
+            return PushNotification._push_service
 
     @staticmethod
     def send_notification_reminder(fcm_token: str, message_title: str, message_body: str ):
-        push_service.notify_single_device(
-            registration_id=fcm_token, 
-            message_title=message_title, 
-            message_body=message_body)
-        
+        return PushNotification.send_multicast([fcm_token], message_title, message_body)
+
+    @staticmethod
+    def send_multicast(fcm_tokens: List[str], message_title: str, message_body: str) -> Dict[str, Dict]:
+        fcm_tokens = list(dict.fromkeys(token for token in fcm_tokens if token))
+        try:
+            results = PushNotification.push_service().send_many(fcm_tokens, message_title, message_body)
+        except (OSError, ValueError, GoogleAuthError) as e:
+            current_app.logger.error('Push to %d devices failed: %s', len(fcm_tokens), e)
+            results = {token: {'error': str(e), 'retry': True} for token in fcm_tokens}
+        PushNotification.handle_results(results)
+        return results
+
+    @staticmethod
+    def is_dead_token(result: Dict) -> bool:
+        if result.get('error') in PushNotification.DEAD_TOKEN_ERRORS:
+            return True
+        return result.get('error') == 'INVALID_ARGUMENT' and PushNotification.TOKEN_FIELD in result.get('fields', ())
+
+    @staticmethod
+    def handle_results(results: Dict[str, Dict]) -> None:
+        dead_tokens = [token for token, result in results.items() if PushNotification.is_dead_token(result)]
+        pruned = 0
+        if dead_tokens:
+            try:
+                pruned = UserExecutor.clear_fcm_tokens(dead_tokens)
+            except SQLAlchemyError:
+                current_app.logger.exception('Could not clear %d dead FCM tokens', len(dead_tokens))
+        failed = sum(1 for result in results.values() if 'error' in result)
+        with PushNotification._lock:
+            PushNotification._counters['sent'] += len(results) - failed
+            PushNotification._counters['failed'] += failed
+            PushNotification._counters['pruned_tokens'] += pruned
+
     @staticmethod
-    @scheduler.task( trigger="cron", id="interval_1",minute="*")
-    def scheduled_send():
-        with app.app_context():
-            curent_time = datetime.now().replace(second=0, microsecond=0)
-            time_cooming= curent_time+ timedelta(minutes=10)
-            bookings=BookingExecutor.get_list_meeting_cooming(time_cooming)
-            if bookings:
-                users = []
-                for booking in bookings:
-                    users.extend([booking_user.user for booking_user in booking.booking_user])  
-                    for user in users:
-                        if user.fcm_token:
-                            PushNotification.send_notification_reminder(
-                                fcm_token=user.fcm_token,
-                                message_title=booking.title,
-                                message_body="The meeting will take place in 10 minutes ")
-                        EmailSender.send_mail_reminder(booking, user) 
\ No newline at end of file
+    def counters() -> Dict[str, int]:
+        with PushNotification._lock:
+            return dict(PushNotification._counters)
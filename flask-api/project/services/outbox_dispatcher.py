@@ -0,0 +1,115 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from flask import current_app
+from project import celery, db, scheduler
+from project.config import BaseConfig
+from project.database.excute.outbox import OutboxExecutor
+from project.services.email_service import EmailSender
+from project.services.notification_service import PushNotification
+from project.services.scheduler_leader import SchedulerLeader
+from project.services.task_dispatcher import TaskDispatcher
+
+
+class OutboxDispatcher:
+    EMAIL = 'email'
+    PUSH = 'push'
+    RETRYABLE_PUSH_ERRORS = ('UNAVAILABLE', 'INTERNAL', 'QUOTA_EXCEEDED')
+    _drain_lock = threading.Lock()
+
+    @staticmethod
+    def enqueue_emails(messages: List[Dict]) -> None:
+        if messages:
+            OutboxExecutor.add(OutboxDispatcher.EMAIL, {"messages": messages})
+            db.session.info['outbox_enqueued'] = True
+
+    @staticmethod
+    def enqueue_push(fcm_tokens: List[str], message_title: str, message_body: str) -> None:
+        fcm_tokens = [token for token in fcm_tokens if token]
+        if fcm_tokens:
+            OutboxExecutor.add(OutboxDispatcher.PUSH, {
+                "fcm_tokens": fcm_tokens, "message_title": message_title, "message_body": message_body})
+            db.session.info['outbox_enqueued'] = True
+
+    @staticmethod
+    def send_emails(payload: Dict) -> Tuple[Dict, str]:
+        failures = EmailSender.send_messages(payload["messages"])
+        failed = {failure["recipient"] for failure in failures}
+        remaining = [message for message in payload["messages"] if failed.intersection(message["recipients"])]
+        return dict(payload, messages=remaining), '; '.join(failure["error"] for failure in failures)
+
+    @staticmethod
+    def send_push(payload: Dict) -> Tuple[Dict, str]:
+        results = PushNotification.send_multicast(
+            payload["fcm_tokens"], payload["message_title"], payload["message_body"])
+        retry = {token: result for token, result in results.items()
+                 if result.get('retry') or result.get('error') in OutboxDispatcher.RETRYABLE_PUSH_ERRORS}
+        return dict(payload, fcm_tokens=list(retry)), '; '.join(result["error"] for result in retry.values())
+
+    @staticmethod
+    def backoff(attempts: int) -> timedelta:
+        seconds = current_app.config['OUTBOX_RETRY_BASE_SECONDS'] * 2 ** (attempts - 1)
+        return timedelta(seconds=min(seconds, current_app.config['OUTBOX_RETRY_MAX_SECONDS']))
+
+    @staticmethod
+    def process(entry: Dict) -> bool:
+        send = OutboxDispatcher.send_emails if entry["kind"] == OutboxDispatcher.EMAIL else OutboxDispatcher.send_push
+        try:
+            remaining, error = send(entry["payload"])
+        except Exception as e:
+            current_app.logger.exception('Outbox entry %s failed', entry["id"])
+            remaining, error = entry["payload"], str(e)
+
+        if not remaining.get("messages") and not remaining.get("fcm_tokens"):
+            return True
+        if entry["attempts"] >= current_app.config['OUTBOX_MAX_ATTEMPTS']:
+            OutboxExecutor.mark_failed(entry["id"], remaining, error)
+        else:
+            OutboxExecutor.retry_later(
+                entry["id"], remaining, datetime.now() + OutboxDispatcher.backoff(entry["attempts"]), error)
+        return False
+
+    @staticmethod
+    def drain() -> int:
+        if not OutboxDispatcher._drain_lock.acquire(blocking=False):
+            return 0
+        processed = 0
+        try:
+            while True:
+                entries = OutboxExecutor.claim_batch(current_app.config['OUTBOX_BATCH_SIZE'],
+                                                     current_app.config['OUTBOX_CLAIM_SECONDS'])
+                if not entries:
+                    return processed
+                sent = [entry["id"] for entry in entries if OutboxDispatcher.process(entry)]
+                if sent:
+                    OutboxExecutor.mark_sent(sent)
+                processed += len(entries)
+        finally:
+            OutboxDispatcher._drain_lock.release()
+
+    @celery.task
+    def drain_task():
+        return OutboxDispatcher.drain()
+
+    @staticmethod
+    def kick() -> None:
+        TaskDispatcher.dispatch(OutboxDispatcher.drain_task)
+
+    @staticmethod
+    @scheduler.task(trigger="interval", id="outbox_drain", seconds=BaseConfig.OUTBOX_POLL_SECONDS)
+    @SchedulerLeader.leader_only
+    def scheduled_drain():
+        OutboxDispatcher.drain()
+
+
+@event.listens_for(Session, 'after_commit')
+def _kick_after_commit(session):
+    if session.info.pop('outbox_enqueued', False) and current_app.config['OUTBOX_KICK']:
+        OutboxDispatcher.kick()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_kick(session):
+    session.info.pop('outbox_enqueued', None)
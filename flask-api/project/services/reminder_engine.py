@@ -0,0 +1,168 @@
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from project import scheduler
+from project.config import BaseConfig
+from project.database.excute.booking import BookingExecutor
+from project.database.excute.reminder import ReminderExecutor
+from project.models import Booking
+from project.services.email_service import EmailSender
+from project.services.outbox_dispatcher import OutboxDispatcher
+from project.services.scheduler_leader import SchedulerLeader
+
+Reminder = Tuple[datetime, int, int]
+
+
+class ReminderEngine:
+    """Min-heap of reminder fire times for bookings starting inside the loaded window."""
+    _heap: List[Reminder] = []
+    _scheduled: Dict[Tuple[int, int], datetime] = {}
+    _sent: Set[Tuple[int, int, datetime]] = set()
+    _loaded_until: Optional[datetime] = None
+    _refreshed_at = 0.0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def lead_minutes() -> List[int]:
+        return sorted(set(current_app.config['REMINDER_LEAD_MINUTES']))
+
+    @staticmethod
+    def _schedule(booking_id: int, time_start: datetime, now: datetime, leads: Iterable[int],
+                  sent: Set[Tuple[int, int, datetime]] = frozenset()) -> None:
+        if time_start <= now:
+            return
+        for lead in leads:
+            fire_at = time_start - timedelta(minutes=lead)
+            if fire_at < ReminderEngine._loaded_until and (booking_id, lead, time_start) not in sent:
+                ReminderEngine._scheduled[(booking_id, lead)] = fire_at
+                heapq.heappush(ReminderEngine._heap, (fire_at, booking_id, lead))
+
+    @staticmethod
+    def load_window(now: datetime) -> None:
+        # changes committed in this process reach the heap through apply_change; those made in
+        # other processes are picked up here, at most REMINDER_REFRESH_SECONDS late, and
+        # prepare() re-checks every due entry against the row, so a cancelled booking never fires
+        loaded_until = now + timedelta(minutes=current_app.config['REMINDER_WINDOW_MINUTES'])
+        max_lead = timedelta(minutes=max(ReminderEngine.lead_minutes()))
+        bookings = BookingExecutor.get_upcoming_booking_starts(now, loaded_until + max_lead)
+        sent = ReminderExecutor.get_sent(now, loaded_until + max_lead)
+        with ReminderEngine._lock:
+            ReminderEngine._heap = []
+            ReminderEngine._scheduled = {}
+            ReminderEngine._sent = sent
+            ReminderEngine._loaded_until = loaded_until
+            for booking_id, time_start in bookings:
+                ReminderEngine._schedule(booking_id, time_start, now, ReminderEngine.lead_minutes(), sent)
+            ReminderEngine._refreshed_at = time.monotonic()
+
+    @staticmethod
+    def apply_change(booking_id: int, time_start: Optional[datetime], is_cancelled: bool) -> None:
+        with ReminderEngine._lock:
+            if ReminderEngine._loaded_until is None:
+                return
+            for lead in ReminderEngine.lead_minutes():
+                ReminderEngine._scheduled.pop((booking_id, lead), None)
+            if not is_cancelled:
+                ReminderEngine._schedule(booking_id, time_start, datetime.now(), ReminderEngine.lead_minutes(),
+                                         ReminderEngine._sent)
+
+    @staticmethod
+    def pop_due(now: datetime) -> List[Tuple[int, int]]:
+        due = []
+        with ReminderEngine._lock:
+            while ReminderEngine._heap and ReminderEngine._heap[0][0] <= now:
+                fire_at, booking_id, lead = heapq.heappop(ReminderEngine._heap)
+                if ReminderEngine._scheduled.get((booking_id, lead)) == fire_at:
+                    del ReminderEngine._scheduled[(booking_id, lead)]
+                    due.append((booking_id, lead))
+        return due
+
+    @staticmethod
+    def tick() -> None:
+        now = datetime.now()
+        if time.monotonic() - ReminderEngine._refreshed_at >= current_app.config['REMINDER_REFRESH_SECONDS'] \
+                or ReminderEngine._loaded_until is None or ReminderEngine._loaded_until <= now:
+            ReminderEngine.load_window(now)
+
+        due = ReminderEngine.pop_due(now)
+        if not due:
+            return
+        bookings = {booking.booking_id: booking
+                    for booking in BookingExecutor.get_bookings_for_reminder([booking_id for booking_id, _ in due])}
+        reminders = [ReminderEngine.prepare(bookings[booking_id], lead, now)
+                     for booking_id, lead in due if booking_id in bookings]
+        for reminder in reminders:
+            if reminder is not None:
+                ReminderEngine.send(reminder)
+
+    @staticmethod
+    def prepare(booking: Booking, lead: int, now: datetime) -> Optional[Dict]:
+        if booking.time_start <= now:
+            return None
+        if booking.time_start - timedelta(minutes=lead) > now:
+            with ReminderEngine._lock:
+                ReminderEngine._schedule(booking.booking_id, booking.time_start, now, [lead])
+            return None
+        # a shorter lead that is also due supersedes this one
+        if any(other < lead and booking.time_start - timedelta(minutes=other) <= now
+               for other in ReminderEngine.lead_minutes()):
+            return None
+
+        minutes_left = round((booking.time_start - now).total_seconds() / 60)
+        users = [booking_user.user for booking_user in booking.booking_user]
+        return {
+            "booking_id": booking.booking_id,
+            "lead": lead,
+            "time_start": booking.time_start,
+            "minutes_left": minutes_left,
+            "title": booking.title,
+            "fcm_tokens": [user.fcm_token for user in users if user.fcm_token],
+            "messages": [EmailSender.build_reminder(booking, user, minutes_left) for user in users]
+        }
+
+    @staticmethod
+    def send(reminder: Dict) -> None:
+        # the outbox rows commit together with the sent-log row, or not at all
+        OutboxDispatcher.enqueue_push(
+            fcm_tokens=reminder["fcm_tokens"],
+            message_title=reminder["title"],
+            message_body=f"The meeting will take place in {reminder['minutes_left']} minutes")
+        OutboxDispatcher.enqueue_emails(reminder["messages"])
+        if ReminderExecutor.mark_sent(reminder["booking_id"], reminder["lead"], reminder["time_start"]):
+            with ReminderEngine._lock:
+                ReminderEngine._sent.add((reminder["booking_id"], reminder["lead"], reminder["time_start"]))
+
+    @staticmethod
+    @scheduler.task(trigger="interval", id="reminder_tick", seconds=BaseConfig.REMINDER_TICK_SECONDS)
+    @SchedulerLeader.leader_only
+    def scheduled_tick():
+        ReminderEngine.tick()
+
+
+@event.listens_for(Booking, 'after_insert')
+@event.listens_for(Booking, 'after_update')
+def _booking_written(mapper, connection, target):
+    changes = object_session(target).info.setdefault('reminder_changes', {})
+    changes[target.booking_id] = (target.time_start, target.is_deleted or target.deleted_at is not None)
+
+
+@event.listens_for(Booking, 'after_delete')
+def _booking_deleted(mapper, connection, target):
+    changes = object_session(target).info.setdefault('reminder_changes', {})
+    changes[target.booking_id] = (None, True)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_committed_changes(session):
+    for booking_id, change in session.info.pop('reminder_changes', {}).items():
+        ReminderEngine.apply_change(booking_id, *change)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('reminder_changes', None)
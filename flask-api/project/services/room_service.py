@@ -5,6 +5,8 @@ from project.models import Room, Booking
 from werkzeug.exceptions import Conflict, BadRequest, NotFound, InternalServerError
 from typing import Optional, Dict, List
 from project.api.common.base_response import BaseResponse
+from project.cache.room_status_cache import RoomStatusCache
+from project.database.routing import fresh_reads
 
 class RoomService:
     @staticmethod
@@ -62,7 +64,7 @@ class RoomService:
             raise BadRequest("Room name already exists")
 
         room_to_update.room_name = room_name
-        db.commit()
+        db.session.commit()
         return BaseResponse.success(message="update room successfully!")
         
 
@@ -120,15 +122,26 @@ class RoomService:
 
     @staticmethod
     def get_status_rooms(page: int, per_page: int):
-        paginated_rooms, total_items, total_pages = RoomExecutor.get_rooms_with_status(page, per_page)
-
-        return {
-            "rooms": [room.serialize() for room in paginated_rooms],
+        cached = RoomStatusCache.get(page, per_page)
+        if cached is not None:
+            return cached
+
+        with fresh_reads():
+            rooms_with_status, total_items, total_pages = RoomExecutor.get_rooms_with_status(page, per_page)
+        next_boundaries = [next_boundary for _, _, next_boundary in rooms_with_status if next_boundary]
+
+        result = {
+            "rooms": [
+                dict(room.serialize(), is_busy=is_busy, description="BUSY" if is_busy else "FREE")
+                for room, is_busy, _ in rooms_with_status
+            ],
             "total_items": total_items,
             "current_page": page,
             "per_page": per_page,
             "total_pages": total_pages
         }
+        RoomStatusCache.set(page, per_page, result, min(next_boundaries) if next_boundaries else None)
+        return result
         
 
     @staticmethod
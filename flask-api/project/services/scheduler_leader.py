@@ -0,0 +1,64 @@
+import functools
+import os
+import socket
+import threading
+import time
+import uuid
+from flask import current_app
+from project import scheduler
+from project.config import BaseConfig
+from project.database.excute.scheduler_lease import SchedulerLeaseExecutor
+
+
+class SchedulerLeader:
+    LEASE_NAME = 'scheduler'
+    owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+    _lease_expires = 0.0
+    _lock = threading.Lock()
+
+    @staticmethod
+    def renew() -> bool:
+        with SchedulerLeader._lock:
+            started = time.monotonic()
+            try:
+                acquired = SchedulerLeaseExecutor.try_acquire(
+                    SchedulerLeader.LEASE_NAME, SchedulerLeader.owner, current_app.config['SCHEDULER_LEASE_TTL'])
+            except Exception:
+                current_app.logger.exception('Could not renew the scheduler lease')
+                acquired = False
+            was_leader = SchedulerLeader._lease_expires > started
+            SchedulerLeader._lease_expires = started + current_app.config['SCHEDULER_LEASE_TTL'] if acquired else 0.0
+            if acquired != was_leader:
+                current_app.logger.info('Scheduler %s %s leadership', SchedulerLeader.owner,
+                                        'acquired' if acquired else 'lost')
+            return acquired
+
+    @staticmethod
+    def is_leader() -> bool:
+        remaining = SchedulerLeader._lease_expires - time.monotonic()
+        if remaining > current_app.config['SCHEDULER_HEARTBEAT_SECONDS']:
+            return True
+        return SchedulerLeader.renew()
+
+    @staticmethod
+    def release() -> None:
+        if SchedulerLeader._lease_expires <= time.monotonic():
+            return
+        SchedulerLeader._lease_expires = 0.0
+        with scheduler.app.app_context():
+            SchedulerLeaseExecutor.release(SchedulerLeader.LEASE_NAME, SchedulerLeader.owner)
+
+    @staticmethod
+    def leader_only(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with scheduler.app.app_context():
+                if SchedulerLeader.is_leader():
+                    return func(*args, **kwargs)
+        return wrapper
+
+    @staticmethod
+    @scheduler.task(trigger="interval", id="scheduler_heartbeat", seconds=BaseConfig.SCHEDULER_HEARTBEAT_SECONDS)
+    def heartbeat():
+        with scheduler.app.app_context():
+            SchedulerLeader.renew()
@@ -0,0 +1,32 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from flask import Flask, current_app
+
+
+class TaskDispatcher:
+    _executor: Optional[ThreadPoolExecutor] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _get_executor() -> ThreadPoolExecutor:
+        with TaskDispatcher._lock:
+            if TaskDispatcher._executor is None:
+                TaskDispatcher._executor = ThreadPoolExecutor(
+                    max_workers=current_app.config['TASK_FALLBACK_WORKERS'], thread_name_prefix='task-fallback')
+            return TaskDispatcher._executor
+
+    @staticmethod
+    def dispatch(task, *args):
+        if current_app.config['CELERY_BROKER_URL']:
+            return task.delay(*args)
+        app = current_app._get_current_object()
+        return TaskDispatcher._get_executor().submit(TaskDispatcher._run, app, task, args)
+
+    @staticmethod
+    def _run(app: Flask, task, args):
+        with app.app_context():
+            try:
+                return task(*args)
+            except Exception:
+                app.logger.exception('Task %s failed', task.name)
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from project import app, db
+from project import db
 from werkzeug.exceptions import Conflict, Unauthorized, NotFound, BadRequest
 from project.models.user import User
 from project.models.user_has_role import UserHasRole
@@ -178,7 +178,7 @@ class UserService:
         new_password = data.get('new_password')
         confirm_password = data.get('confirm_password')
 
-        user_id = get_jwt_identity()
+        user_id = int(get_jwt_identity())
         user = UserExecutor.get_user(user_id)
 
         if not user:
@@ -202,7 +202,7 @@ class UserService:
     def edit_profile(data: Dict):
         new_name = data.get('user_name')
         new_phone_number = data.get('phone_number')
-        user_id = get_jwt_identity()
+        user_id = int(get_jwt_identity())
         user = UserExecutor.get_user(user_id)
 
         if not user:
@@ -0,0 +1,14 @@
+from project.cache.booking_interval_index import BookingIntervalIndex
+from project.cache.count_cache import CountCache
+from project.cache.permission_cache import PermissionCache
+from project.cache.room_status_cache import RoomStatusCache
+from project.database.routing import ReplicaRouter
+
+
+def clear_caches() -> None:
+    """Empties every process-wide cache, for tests and benchmarks that reseed the database."""
+    PermissionCache.invalidate_all()
+    RoomStatusCache.invalidate_all()
+    BookingIntervalIndex.invalidate_all()
+    CountCache._cache.clear()
+    ReplicaRouter.clear()
@@ -0,0 +1,17 @@
+import signal
+import sys
+import time
+from project import create_app, scheduler
+from project.services.scheduler_leader import SchedulerLeader
+
+if __name__ == '__main__':
+    app = create_app()
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+    if not scheduler.running:
+        scheduler.start()
+    try:
+        while True:
+            time.sleep(1)
+    except (KeyboardInterrupt, SystemExit):
+        scheduler.shutdown()
+        SchedulerLeader.release()
@@ -0,0 +1,133 @@
+import os
+
+# set before project.config is imported so load_dotenv cannot point the suite at real services
+os.environ.update({
+    'CELERY_BROKER_URL': '',
+    'SQLALCHEMY_REPLICA_URIS': '',
+    'SCHEDULER_AUTOSTART': 'false',
+    'OUTBOX_KICK': 'false',
+    'TOKEN_EXPIRATION_DAYS': '1',
+})
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from project import create_app, db
+from project.config import TestingConfig
+from project.models import Booking, BookingUser, Permission, Role, RoleHasPermission, Room, User, UserHasRole
+from project.services.login_service import AuthService
+from project.testing import clear_caches
+from tests.query_budget import QueryCounter
+
+PASSWORD = 'pass1234'
+METRICS_HEADERS = {'Authorization': 'Bearer test-metrics-token'}
+USER_COUNT = 12
+ROOM_COUNT = 6
+BOOKING_COUNT = 40
+ATTENDEES_PER_BOOKING = 5
+
+
+class Config(TestingConfig):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    JWT_SECRET_KEY = 'test-secret-key-that-is-long-enough-for-hs256'
+    MAIL_SERVER = 'localhost'
+    MAIL_DEFAULT_SENDER = 'noreply@example.com'
+    SCHEDULER_API_ENABLED = False
+    METRICS_TOKEN = 'test-metrics-token'
+    METRICS_ALLOWED_IPS = ['10.1.0.0/16']
+
+
+def seed_database() -> SimpleNamespace:
+    now = datetime.now().replace(microsecond=0)
+    permissions = [Permission(permission_name=name) for name in ('view', 'create', 'update', 'delete', 'search')]
+    admin_role = Role(role_name='admin')
+    user_role = Role(role_name='user')
+    db.session.add_all(permissions + [admin_role, user_role])
+    db.session.flush()
+    db.session.add_all(RoleHasPermission(role_id=admin_role.role_id, permission_id=permission.permission_id)
+                       for permission in permissions)
+    db.session.add_all(RoleHasPermission(role_id=user_role.role_id, permission_id=permission.permission_id)
+                       for permission in permissions if permission.permission_name != 'delete')
+
+    hashed = User()
+    hashed.set_password(PASSWORD)
+    users = [User(user_name=f'user{index}', email=f'user{index}@example.com', phone_number=f'09{index:08d}',
+                  password=hashed.password, created_at=now, updated_at=now, is_deleted=False,
+                  fcm_token=f'token-{index}')
+             for index in range(USER_COUNT)]
+    db.session.add_all(users)
+    db.session.flush()
+    db.session.add(UserHasRole(user_id=users[0].user_id, role_id=admin_role.role_id))
+    db.session.add_all(UserHasRole(user_id=user.user_id, role_id=user_role.role_id) for user in users[1:])
+
+    rooms = [Room(room_name=f'Room {index}', description='Meeting room', is_blocked=index == ROOM_COUNT - 1)
+             for index in range(ROOM_COUNT)]
+    db.session.add_all(rooms)
+    db.session.flush()
+
+    bookings = []
+    for index in range(BOOKING_COUNT):
+        time_start = now + timedelta(hours=index - 10)
+        bookings.append(Booking(
+            title=f'Meeting {index}', time_start=time_start, time_end=time_start + timedelta(minutes=45),
+            is_accepted=index % 2 == 0, is_deleted=False, room_id=rooms[index % (ROOM_COUNT - 1)].room_id,
+            creator_id=users[index % USER_COUNT].user_id))
+    db.session.add_all(bookings)
+    db.session.flush()
+    db.session.add_all(BookingUser(booking_id=booking.booking_id, user_id=user.user_id, is_attending=None)
+                       for booking in bookings for user in users[:ATTENDEES_PER_BOOKING])
+    db.session.commit()
+
+    return SimpleNamespace(
+        admin_id=users[0].user_id,
+        member_id=users[1].user_id,
+        user_ids=[user.user_id for user in users],
+        room_ids=[room.room_id for room in rooms],
+        blocked_room_id=rooms[-1].room_id,
+        booking_ids=[booking.booking_id for booking in bookings],
+        now=now,
+    )
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app(Config)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def seed(app):
+    # only the default bind: test_replica_routing registers replica binds on another app
+    db.drop_all(bind_key=None)
+    db.create_all(bind_key=None)
+    seeded = seed_database()
+    clear_caches()
+    yield seeded
+    db.session.remove()
+
+
+@pytest.fixture
+def client(app, seed):
+    return app.test_client()
+
+
+def _auth_headers(user_id: int) -> dict:
+    token = AuthService.login_user(db.session.get(User, user_id))[0]["token"]
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def admin_headers(seed):
+    return _auth_headers(seed.admin_id)
+
+
+@pytest.fixture
+def member_headers(seed):
+    return _auth_headers(seed.member_id)
+
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager factory counting the SQL statements run inside the block."""
+    return lambda: QueryCounter(db.engine)
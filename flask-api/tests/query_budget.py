@@ -0,0 +1,52 @@
+import functools
+from typing import List
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from project import db
+
+
+class QueryCounter:
+    """Records every statement sent to the database while the block runs."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.statements: List[str] = []
+
+    def __enter__(self) -> 'QueryCounter':
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def report(self, budget: int) -> str:
+        lines = [f'{self.count} SQL statements, budget is {budget}:']
+        lines += [f'  {index}. {" ".join(statement.split())[:200]}'
+                  for index, statement in enumerate(self.statements, 1)]
+        return '\n'.join(lines)
+
+    def assert_within(self, budget: int) -> None:
+        assert self.count <= budget, self.report(budget)
+
+
+def query_budget(budget: int):
+    """Fails the decorated test when its body runs more than `budget` statements.
+
+    Fixtures are set up before the body runs, so seeding and logging in are not counted.
+    """
+    def decorator(test):
+        @functools.wraps(test)
+        def wrapper(*args, **kwargs):
+            with QueryCounter(db.engine) as counter:
+                result = test(*args, **kwargs)
+            counter.assert_within(budget)
+            return result
+        return wrapper
+    return decorator
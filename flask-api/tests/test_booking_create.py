@@ -0,0 +1,99 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from project.database.excute.booking import BookingExecutor
+from project.models import Booking, BookingUser, NotificationOutbox
+
+ROUTES = [('/v1/bookings', 'admin_headers'), ('/v1/user/bookings', 'member_headers')]
+
+
+def booking_body(seed, user_ids):
+    day = f'{seed.now.year + 1}-01-15'
+    return {'room_id': 1, 'title': 'Kickoff', 'time_start': f'{day} 10:00:00', 'time_end': f'{day} 11:00:00',
+            'user_ids': user_ids}
+
+
+@pytest.fixture
+def commits(app):
+    seen = []
+
+    def count(session):
+        seen.append(session)
+    event.listen(Session, 'after_commit', count)
+    yield seen
+    event.remove(Session, 'after_commit', count)
+
+
+@pytest.mark.parametrize('path, headers', ROUTES)
+def test_booking_attendees_and_outbox_commit_together(path, headers, client, seed, commits, request):
+    outbox_before = NotificationOutbox.query.count()
+    response = client.post(path, json=booking_body(seed, [2, 3, 3, 4]), headers=request.getfixturevalue(headers))
+
+    assert response.status_code == 200, response.get_json()
+    assert len(commits) == 1
+    booking = Booking.query.filter_by(title='Kickoff').one()
+    assert sorted(attendee.user_id for attendee in booking.booking_user) == [2, 3, 4]
+    assert NotificationOutbox.query.count() == outbox_before + 1
+
+
+@pytest.mark.parametrize('path, headers', ROUTES)
+def test_unknown_user_ids_are_rejected_before_writing(path, headers, client, seed, request):
+    bookings_before, attendees_before = Booking.query.count(), BookingUser.query.count()
+    response = client.post(path, json=booking_body(seed, [2, 998, 999]), headers=request.getfixturevalue(headers))
+
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == [{'field': 'user_ids', 'error': 'Users not found: 998, 999'}]
+    assert (Booking.query.count(), BookingUser.query.count()) == (bookings_before, attendees_before)
+
+
+class MySQLError(Exception):
+    def __init__(self, errno):
+        super().__init__(errno, 'Deadlock found when trying to get lock; try restarting transaction')
+        self.errno = errno
+
+
+@pytest.mark.parametrize('path, headers', ROUTES)
+def test_lock_deadlock_is_reported_as_conflict(path, headers, client, seed, request, monkeypatch):
+    def deadlock(booking):
+        raise OperationalError('SELECT ... FOR UPDATE', {}, MySQLError(1213))
+    monkeypatch.setattr(BookingExecutor, 'ensure_room_available', staticmethod(deadlock))
+    bookings_before = Booking.query.count()
+
+    response = client.post(path, json=booking_body(seed, [2]), headers=request.getfixturevalue(headers))
+
+    assert response.status_code == 409
+    assert Booking.query.count() == bookings_before
+
+
+@pytest.mark.parametrize('path, headers', ROUTES)
+def test_numeric_string_user_ids_are_accepted(path, headers, client, seed, request):
+    response = client.post(path, json=booking_body(seed, ['2', '3', 3]), headers=request.getfixturevalue(headers))
+
+    assert response.status_code == 200, response.get_json()
+    booking = Booking.query.filter_by(title='Kickoff').one()
+    assert sorted(attendee.user_id for attendee in booking.booking_user) == [2, 3]
+
+
+@pytest.mark.parametrize('user_ids', [['x'], [2, None], [2.5], 'abc'])
+@pytest.mark.parametrize('path, headers', ROUTES)
+def test_non_numeric_user_ids_are_rejected(path, headers, user_ids, client, seed, request):
+    bookings_before = Booking.query.count()
+    response = client.post(path, json=booking_body(seed, user_ids), headers=request.getfixturevalue(headers))
+
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == [{'field': 'user_ids', 'error': 'User ids must be integers'}]
+    assert Booking.query.count() == bookings_before
+
+
+@pytest.mark.parametrize('time_start', ['next monday', '2030-01-15T10:00:00+07:00', None])
+@pytest.mark.parametrize('path, headers', ROUTES)
+def test_unparseable_times_are_rejected(path, headers, time_start, client, seed, request):
+    bookings_before = Booking.query.count()
+    body = dict(booking_body(seed, [seed.member_id]), time_start=time_start)
+    response = client.post(path, json=body, headers=request.getfixturevalue(headers))
+
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == [
+        {'field': 'time_start', 'error': 'Time must be formatted as YYYY-MM-DD HH:MM:SS'}]
+    assert Booking.query.count() == bookings_before
@@ -0,0 +1,77 @@
+import random
+from datetime import datetime, timedelta
+from project import db
+from project.cache.booking_interval_index import BookingIntervalIndex, RoomIntervalIndex
+from project.database.excute.booking import BookingExecutor
+from project.models import Booking
+
+
+def test_tree_matches_a_linear_scan():
+    rng = random.Random(4)
+    base = datetime(2030, 1, 1)
+    index, bookings = RoomIntervalIndex(), {}
+    for booking_id in range(2000):
+        if bookings and rng.random() < 0.3:
+            removed = rng.choice(list(bookings))
+            index.remove(removed)
+            del bookings[removed]
+        else:
+            time_start = base + timedelta(minutes=rng.randrange(0, 60 * 24 * 30, 15))
+            bookings[booking_id] = (time_start, time_start + timedelta(minutes=rng.choice((15, 30, 60, 240))))
+            index.add(booking_id, *bookings[booking_id])
+
+        query_start = base + timedelta(minutes=rng.randrange(0, 60 * 24 * 30, 15))
+        query_end = query_start + timedelta(minutes=rng.choice((15, 60)))
+        exclude = rng.choice(list(bookings)) if bookings and rng.random() < 0.5 else None
+        overlapping = {other for other, (time_start, time_end) in bookings.items()
+                       if time_start < query_end and time_end > query_start and other != exclude}
+        found = index.find_overlap(query_start, query_end, exclude)
+        assert found in overlapping if overlapping else found is None
+    assert len(index) == len(bookings)
+
+
+def test_moving_a_booking_replaces_its_interval():
+    index = RoomIntervalIndex()
+    nine, ten = datetime(2030, 1, 1, 9), datetime(2030, 1, 1, 10)
+    index.add(1, nine, ten)
+    index.add(1, ten, ten + timedelta(hours=1))
+
+    assert index.find_overlap(nine, ten) is None
+    assert index.find_overlap(ten, ten + timedelta(minutes=30)) == 1
+
+
+def test_load_that_races_a_commit_is_not_installed(seed, monkeypatch):
+    room_id = seed.room_ids[0]
+    time_start = seed.now.replace(hour=0, minute=0, second=0) + timedelta(days=400)
+    time_end = time_start + timedelta(hours=1)
+    load = BookingExecutor.get_active_room_intervals
+    loads = []
+
+    def load_while_another_request_commits(room, since):
+        intervals = load(room, since)
+        if not loads:
+            # commits after the read and before the install, as a concurrent booking would
+            db.session.add(Booking(title='Concurrent', time_start=time_start, time_end=time_end,
+                                   is_accepted=True, is_deleted=False, room_id=room_id,
+                                   creator_id=seed.admin_id))
+            db.session.commit()
+        loads.append(len(intervals))
+        return intervals
+    monkeypatch.setattr(BookingExecutor, 'get_active_room_intervals', staticmethod(load_while_another_request_commits))
+
+    assert BookingIntervalIndex.has_conflict(room_id, time_start, time_end)
+    assert loads[1] == loads[0] + 1
+
+
+def test_room_that_keeps_changing_is_answered_but_not_cached(seed, monkeypatch):
+    room_id = seed.room_ids[0]
+    load = BookingExecutor.get_active_room_intervals
+
+    def load_during_commits(room, since):
+        BookingIntervalIndex.apply_change(10 ** 6, room, seed.now, seed.now, True)
+        return load(room, since)
+    monkeypatch.setattr(BookingExecutor, 'get_active_room_intervals', staticmethod(load_during_commits))
+
+    assert not BookingIntervalIndex.has_conflict(
+        room_id, seed.now + timedelta(days=400), seed.now + timedelta(days=400, hours=1))
+    assert room_id not in BookingIntervalIndex._rooms
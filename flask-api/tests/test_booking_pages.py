@@ -0,0 +1,29 @@
+import pytest
+from project.api.common.cursor import Cursor
+
+LISTS = [('/v1/admin/view_booking_pending', 'admin_headers'), ('/v1/user/view_booked', 'member_headers'),
+         ('/v1/user/view_list_invite', 'member_headers')]
+
+
+@pytest.mark.parametrize('path, headers', LISTS)
+@pytest.mark.parametrize('query', ['per_page=0', 'per_page=-1', 'per_page=101',
+                                   f'cursor={Cursor.encode(1)}&per_page=0'])
+def test_out_of_range_per_page_is_rejected(path, headers, query, client, seed, request, count_queries):
+    with count_queries() as counter:
+        response = client.get(f'{path}?{query}', headers=request.getfixturevalue(headers))
+
+    assert response.status_code == 400
+    assert not [statement for statement in counter.statements if 'FROM booking' in statement]
+
+
+@pytest.mark.parametrize('path, headers', LISTS)
+def test_cursor_pages_walk_the_whole_list(path, headers, client, seed, request):
+    headers = request.getfixturevalue(headers)
+    total = client.get(f'{path}?cursor=&per_page=1&with_count=true', headers=headers).get_json()['data']['total_items']
+    seen, cursor = [], ''
+    while cursor is not None:
+        data = client.get(f'{path}?cursor={cursor}&per_page=1', headers=headers).get_json()['data']
+        seen += [booking['booking_id'] for booking in data['list_bookings']]
+        cursor = data['next_cursor']
+
+    assert len(seen) == len(set(seen)) == total
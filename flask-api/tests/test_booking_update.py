@@ -0,0 +1,58 @@
+from project import db
+from project.models import Booking, BookingUser
+
+
+def update_body(seed, booking_id, user_ids):
+    booking = db.session.get(Booking, booking_id)
+    day = f'{seed.now.year + 1}-02-15'
+    return {'room_id': booking.room_id, 'title': 'Renamed', 'time_start': f'{day} 10:00:00',
+            'time_end': f'{day} 11:00:00', 'user_ids': user_ids}
+
+
+def attendees(booking_id):
+    return {booking_user.user_id: (booking_user.id, booking_user.is_attending)
+            for booking_user in BookingUser.query.filter_by(booking_id=booking_id)}
+
+
+def test_update_keeps_rsvp_and_rows_of_kept_attendees(client, seed, admin_headers):
+    booking_id = seed.booking_ids[30]
+    BookingUser.query.filter_by(booking_id=booking_id, user_id=2).update({'is_attending': True})
+    BookingUser.query.filter_by(booking_id=booking_id, user_id=3).update({'is_attending': False})
+    db.session.commit()
+    before = attendees(booking_id)
+
+    response = client.put(f'/v1/bookings/{booking_id}', json=update_body(seed, booking_id, [2, 3, 4, 9]),
+                          headers=admin_headers)
+
+    assert response.status_code == 200, response.get_json()
+    after = attendees(booking_id)
+    assert sorted(after) == [2, 3, 4, 9]
+    assert {user_id: after[user_id] for user_id in (2, 3, 4)} == {user_id: before[user_id] for user_id in (2, 3, 4)}
+    assert after[9][1] is None
+
+
+def test_unchanged_attendees_write_no_rows(client, seed, admin_headers, count_queries):
+    booking_id = seed.booking_ids[30]
+    current = sorted(attendees(booking_id))
+
+    with count_queries() as counter:
+        response = client.put(f'/v1/bookings/{booking_id}', json=update_body(seed, booking_id, current),
+                              headers=admin_headers)
+
+    assert response.status_code == 200, response.get_json()
+    assert not [statement for statement in counter.statements
+                if statement.startswith(('INSERT INTO booking_user', 'DELETE FROM booking_user'))]
+
+
+def test_update_accepts_numeric_string_user_ids(client, seed, admin_headers):
+    booking_id = seed.booking_ids[30]
+    before = attendees(booking_id)
+    kept = sorted(before)[:2]
+    body = update_body(seed, booking_id, [str(user_id) for user_id in kept])
+
+    response = client.put(f'/v1/bookings/{booking_id}', json=body, headers=admin_headers)
+
+    assert response.status_code == 200, response.get_json()
+    after = attendees(booking_id)
+    assert sorted(after) == kept
+    assert {user_id: after[user_id] for user_id in kept} == {user_id: before[user_id] for user_id in kept}
@@ -0,0 +1,24 @@
+import pytest
+from tests.conftest import METRICS_HEADERS
+
+
+@pytest.mark.parametrize('headers, remote_addr, status', [
+    (METRICS_HEADERS, '127.0.0.1', 200),
+    ({}, '10.1.2.3', 200),
+    ({}, '127.0.0.1', 401),
+    ({'Authorization': 'Bearer wrong-token'}, '192.168.1.5', 401),
+    ({}, 'not-an-address', 401),
+])
+def test_metrics_need_the_token_or_an_allowed_address(headers, remote_addr, status, client):
+    response = client.get('/metrics', headers=headers, environ_base={'REMOTE_ADDR': remote_addr})
+
+    assert response.status_code == status
+    assert (b'db_pool_checkouts_total' in response.data) is (status == 200)
+
+
+def test_metrics_are_closed_when_nothing_is_configured(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'METRICS_TOKEN', None)
+    monkeypatch.setitem(app.config, 'METRICS_ALLOWED_IPS', [])
+
+    assert client.get('/metrics', headers={'Authorization': 'Bearer '}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer None'}).status_code == 401
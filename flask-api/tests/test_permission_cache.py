@@ -0,0 +1,96 @@
+import time
+from flask_jwt_extended import decode_token
+from sqlalchemy import update
+from project import db
+from project.cache.permission_cache import PermissionCache
+from project.cache.ttl_cache import MISSING
+from project.models import Permission, Role, RoleHasPermission, User
+from tests.conftest import _auth_headers
+
+
+def grant_delete_to_user_role():
+    role = Role.query.filter_by(role_name='user').one()
+    permission = Permission.query.filter_by(permission_name='delete').one()
+    db.session.add(RoleHasPermission(role_id=role.role_id, permission_id=permission.permission_id))
+    db.session.flush()
+
+
+def test_role_change_invalidates_only_after_commit(seed):
+    assert 'delete' not in PermissionCache.get_permissions(seed.member_id)
+
+    grant_delete_to_user_role()
+    assert PermissionCache._permissions.get(str(seed.member_id)) is not MISSING
+    db.session.commit()
+
+    assert PermissionCache._permissions.get(str(seed.member_id)) is MISSING
+    assert 'delete' in PermissionCache.get_permissions(seed.member_id)
+
+
+def test_rolled_back_change_keeps_cached_permissions(seed):
+    cached = PermissionCache.get_permissions(seed.member_id)
+
+    grant_delete_to_user_role()
+    db.session.rollback()
+
+    assert PermissionCache._permissions.get(str(seed.member_id)) is cached
+
+
+def test_login_keeps_cached_permissions(client, seed):
+    cached = PermissionCache.get_permissions(seed.member_id)
+
+    response = client.post('/v1/login', json={'email': 'user1@example.com', 'password': 'pass1234',
+                                              'fcm_token': 'fresh-token'})
+
+    assert response.status_code == 200
+    assert db.session.get(User, seed.member_id).fcm_token == 'fresh-token'
+    assert PermissionCache._permissions.get(str(seed.member_id)) is cached
+
+
+def test_deleting_user_invalidates_cached_permissions(seed):
+    PermissionCache.get_permissions(seed.member_id)
+
+    db.session.get(User, seed.member_id).is_deleted = True
+    db.session.commit()
+
+    assert PermissionCache._permissions.get(str(seed.member_id)) is MISSING
+    assert PermissionCache.get_permissions(seed.member_id) == frozenset()
+
+
+def test_warm_permission_check_runs_no_queries(client, seed, member_headers, count_queries):
+    assert client.get('/v1/rooms', headers=member_headers).status_code == 200
+
+    with count_queries() as counter:
+        assert client.get('/v1/rooms/1', headers=member_headers).status_code == 200
+    assert not [statement for statement in counter.statements if 'role_version' in statement]
+
+
+def test_committed_role_change_revokes_tokens_at_once(client, seed, member_headers):
+    assert client.get('/v1/rooms', headers=member_headers).status_code == 200
+
+    grant_delete_to_user_role()
+    db.session.commit()
+
+    assert client.get('/v1/rooms', headers=member_headers).status_code == 401
+
+
+def test_role_change_in_another_worker_revokes_tokens_within_the_ttl(client, seed, monkeypatch):
+    monkeypatch.setattr(PermissionCache._role_versions, 'ttl', 1)
+    headers = _auth_headers(seed.member_id)
+    assert client.get('/v1/rooms', headers=headers).status_code == 200
+
+    # a Core update fires no listeners here, like a commit made by another process
+    users = User.__table__
+    db.session.execute(update(users).where(users.c.user_id == seed.member_id)
+                       .values(role_version=users.c.role_version + 1))
+    db.session.commit()
+
+    assert client.get('/v1/rooms', headers=headers).status_code == 200
+    time.sleep(1.05)
+    assert client.get('/v1/rooms', headers=headers).status_code == 401
+
+
+def test_token_subject_is_the_user_id_as_a_string(client, seed):
+    headers = _auth_headers(seed.member_id)
+
+    assert decode_token(headers['Authorization'].split()[1])['sub'] == str(seed.member_id)
+    assert client.post('/v1/logout', headers=headers).status_code == 200
@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+import pytest
+from werkzeug.serving import make_server
+from werkzeug.wrappers import Request, Response
+from project import db
+from project.models import User
+from project.services.fcm_transport import FCMTransport
+from project.services.notification_service import PushNotification
+from project.services.outbox_dispatcher import OutboxDispatcher
+
+ERRORS = {
+    'dead': (404, 'NOT_FOUND', 'UNREGISTERED'),
+    'bad': (400, 'INVALID_ARGUMENT', 'INVALID_ARGUMENT'),
+    'oversize': (400, 'INVALID_ARGUMENT', 'INVALID_ARGUMENT'),
+    'busy': (503, 'UNAVAILABLE', 'UNAVAILABLE'),
+    'throttled': (429, 'RESOURCE_EXHAUSTED', 'QUOTA_EXCEEDED'),
+}
+
+
+class StandInFCM:
+    """messages:send stand-in: answers by token prefix and records the requests it sees."""
+
+    def __init__(self):
+        self.tokens = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        request = Request(environ)
+        message = json.loads(request.get_data())['message']
+        token = message['token']
+        with self._lock:
+            self.tokens.append(token)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.02)
+        with self._lock:
+            self.in_flight -= 1
+        # 'bad-' tokens are malformed; a 'Too long' title is a payload error that says nothing about the token
+        kind = 'oversize' if message['notification']['title'] == 'Too long' else token.split('-')[0]
+        error = ERRORS.get(kind)
+        if error is None:
+            body, status = {'name': f'projects/test/messages/{token}'}, 200
+        else:
+            status, name, code = error
+            details = [{'@type': 'type.googleapis.com/google.firebase.fcm.v1.FcmError', 'errorCode': code}]
+            if kind in ('bad', 'oversize'):
+                field = 'message.token' if kind == 'bad' else 'message.notification.title'
+                details.append({'@type': 'type.googleapis.com/google.rpc.BadRequest',
+                                'fieldViolations': [{'field': field, 'description': 'Invalid value'}]})
+            body = {'error': {'code': status, 'status': name, 'details': details}}
+        headers = {'Retry-After': '30'} if status == 429 else {}
+        return Response(json.dumps(body), status, headers, content_type='application/json')(environ, start_response)
+
+
+@pytest.fixture
+def fcm(app, monkeypatch):
+    stand_in = StandInFCM()
+    server = make_server('127.0.0.1', 0, stand_in, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setitem(app.config, 'FIREBASE_ADMIN_SDK', None)
+    monkeypatch.setitem(app.config, 'FCM_END_POINT', f'http://127.0.0.1:{server.server_port}/v1/messages:send')
+    monkeypatch.setitem(app.config, 'FCM_CONCURRENCY', 3)
+    monkeypatch.setattr(PushNotification, '_push_service', None)
+    yield stand_in
+    PushNotification._push_service.close()
+    server.shutdown()
+
+
+def test_tokens_are_sent_concurrently_once_each(fcm):
+    tokens = [f'ok-{index}' for index in range(10)]
+
+    results = PushNotification.send_multicast(tokens + tokens[:3] + [None], 'Standup', 'In 10 minutes')
+
+    assert sorted(fcm.tokens) == sorted(tokens)
+    assert 1 < fcm.max_in_flight <= 3
+    assert results == {token: {'message_id': f'projects/test/messages/{token}'} for token in tokens}
+
+
+def test_sends_are_paced_to_the_configured_rate(fcm, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'FCM_MAX_SENDS_PER_SECOND', 20)
+    tokens = [f'ok-{index}' for index in range(10)]
+
+    started = time.monotonic()
+    PushNotification.send_multicast(tokens, 'Standup', 'In 10 minutes')
+
+    # ten sends at 20 per second leave nine 50ms gaps between their starts
+    assert time.monotonic() - started >= 0.45
+    assert sorted(fcm.tokens) == sorted(tokens)
+
+
+def test_throttling_pauses_the_rest_of_the_batch(fcm, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'FCM_CONCURRENCY', 1)
+    tokens = ['throttled-1'] + [f'ok-{index}' for index in range(5)]
+
+    results = PushNotification.send_multicast(tokens, 'Standup', 'Soon')
+
+    assert fcm.tokens == ['throttled-1']
+    assert all(result == {'error': 'QUOTA_EXCEEDED', 'retry': True} for result in results.values())
+    remaining, error = OutboxDispatcher.send_push(
+        {'fcm_tokens': ['ok-9'], 'message_title': 'Standup', 'message_body': 'Soon'})
+    assert (remaining['fcm_tokens'], fcm.tokens) == (['ok-9'], ['throttled-1'])
+
+
+def test_dead_tokens_are_pruned_and_unavailable_ones_retried(fcm, seed):
+    users = [db.session.get(User, user_id) for user_id in seed.user_ids[-3:]]
+    for user, token in zip(users, ('dead-1', 'bad-1', 'busy-1')):
+        user.fcm_token = token
+    db.session.commit()
+
+    remaining, error = OutboxDispatcher.send_push(
+        {'fcm_tokens': ['ok-1', 'dead-1', 'bad-1', 'busy-1'], 'message_title': 'Standup', 'message_body': 'Soon'})
+
+    db.session.expire_all()
+    assert [user.fcm_token for user in users] == [None, None, 'busy-1']
+    assert remaining['fcm_tokens'] == ['busy-1']
+    assert error == 'UNAVAILABLE'
+
+
+def test_missing_credentials_are_retried_not_raised(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'FIREBASE_ADMIN_SDK', '/nonexistent/service-account.json')
+    monkeypatch.setattr(PushNotification, '_push_service', None)
+
+    results = PushNotification.send_multicast(['ok-1'], 'Standup', 'Soon')
+
+    assert results['ok-1']['retry'] is True
+
+
+def test_payload_errors_leave_tokens_in_place(fcm, seed):
+    users = [db.session.get(User, user_id) for user_id in seed.user_ids[-2:]]
+    tokens = [user.fcm_token for user in users]
+
+    results = PushNotification.send_multicast(tokens, 'Too long', 'Soon')
+
+    db.session.expire_all()
+    assert [user.fcm_token for user in users] == tokens
+    assert all(result['error'] == 'INVALID_ARGUMENT' and not result['retry'] for result in results.values())
@@ -0,0 +1,146 @@
+from datetime import timedelta
+from typing import NamedTuple, Optional
+import pytest
+from project import db
+from project.models import Booking, BookingUser, User
+from project.testing import clear_caches
+from tests.conftest import METRICS_HEADERS
+from tests.query_budget import query_budget
+
+
+class Route(NamedTuple):
+    method: str
+    rule: str
+    path: str
+    budget: int
+    role: Optional[str] = 'admin'
+    json: Optional[dict] = None
+    status: int = 200
+
+
+RANGE = 'start_date={start:%Y-%m-%d}&end_date={end:%Y-%m-%d}'
+FUTURE_START = '{future:%Y-%m-%d} 10:00:00'
+FUTURE_END = '{future:%Y-%m-%d} 11:00:00'
+
+# budgets are the statements each seeded request needs today; lower them when a change saves queries
+ROUTES = [
+    Route('OPTIONS', '/v1/form', '/v1/form', 0, role=None),
+    Route('POST', '/v1/login', '/v1/login', 8, role=None,
+          json={'email': 'user1@example.com', 'password': 'pass1234', 'fcm_token': 'new-token'}),
+    Route('POST', '/v1/logout', '/v1/logout', 2, role='member'),
+
+    Route('GET', '/v1/users', '/v1/users', 3),
+    Route('POST', '/v1/users', '/v1/users', 6, json={
+        'user_name': 'New user', 'email': 'new@example.com', 'phone_number': '0912345678',
+        'password': 'pass1234', 'role_id': [2]}),
+    Route('GET', '/v1/users/<int:user_id>', '/v1/users/2', 3),
+    Route('PUT', '/v1/users/<int:user_id>', '/v1/users/3', 8,
+          json={'user_name': 'Renamed', 'phone_number': '0987654321', 'role_id': [2]}),
+    Route('DELETE', '/v1/users/<int:user_id>', '/v1/users/4', 2),
+    Route('PUT', '/v1/users/change_password', '/v1/users/change_password', 2, role='member',
+          json={'current_password': 'pass1234', 'new_password': 'newpass123', 'confirm_password': 'newpass123'}),
+    Route('PUT', '/v1/users/profile', '/v1/users/profile', 3, role='member',
+          json={'user_name': 'Member', 'phone_number': '0911111111'}),
+    Route('GET', '/v1/users/search', '/v1/users/search?search=user1', 3),
+
+    Route('GET', '/v1/rooms', '/v1/rooms', 2),
+    Route('POST', '/v1/rooms', '/v1/rooms', 2, json={'room_name': 'Room new', 'description': 'Meeting room'}),
+    Route('GET', '/v1/rooms/<int:room_id>', '/v1/rooms/1', 1),
+    Route('PUT', '/v1/rooms/<int:room_id>', '/v1/rooms/2', 3, json={'room_name': 'Room renamed'}),
+    Route('PUT', '/v1/rooms/<int:room_id>/blocked', '/v1/rooms/3/blocked', 4, json={'description': 'Maintenance'}),
+    Route('PUT', '/v1/rooms/<int:room_id>/opened', '/v1/rooms/6/opened', 3, json={'description': 'Reopened'}),
+    Route('GET', '/v1/status_rooms', '/v1/status_rooms', 1),
+    Route('GET', '/v1/rooms/search', '/v1/rooms/search?name=Room', 4),
+
+    Route('GET', '/v1/bookings', f'/v1/bookings?{RANGE}', 2),
+    Route('POST', '/v1/bookings', '/v1/bookings', 8, json={
+        'room_id': 1, 'title': 'Planning', 'time_start': FUTURE_START, 'time_end': FUTURE_END,
+        'user_ids': [2, 3, 4]}),
+    Route('GET', '/v1/bookings/<int:booking_id>', '/v1/bookings/21', 3),
+    Route('PUT', '/v1/bookings/<int:booking_id>', '/v1/bookings/28', 7, json={
+        'room_id': 2, 'title': 'Moved', 'time_start': FUTURE_START, 'time_end': FUTURE_END, 'user_ids': [2, 3, 4]}),
+    Route('DELETE', '/v1/bookings/<int:booking_id>', '/v1/bookings/30', 3),
+    Route('GET', '/v1/bookings/search_users', f'/v1/bookings/search_users?{RANGE}&user_ids=2&user_ids=3', 2),
+    Route('GET', '/v1/bookings/search_room/<int:room_id>', f'/v1/bookings/search_room/1?{RANGE}', 2),
+    Route('PUT', '/v1/bookings/<int:booking_id>/accept', '/v1/bookings/24/accept', 7),
+    Route('PUT', '/v1/bookings/<int:booking_id>/reject', '/v1/bookings/26/reject', 7),
+    Route('GET', '/v1/admin/view_booking_pending', '/v1/admin/view_booking_pending', 3),
+    Route('GET', '/v1/user/bookings', f'/v1/user/bookings?{RANGE}', 2, role='member'),
+    Route('POST', '/v1/user/bookings', '/v1/user/bookings', 8, role='member', json={
+        'room_id': 3, 'title': 'Sync', 'time_start': FUTURE_START, 'time_end': FUTURE_END, 'user_ids': [2, 5]}),
+    Route('GET', '/v1/user/view_booked', '/v1/user/view_booked', 3, role='member'),
+    Route('GET', '/v1/user/view_list_invite', '/v1/user/view_list_invite', 3, role='member'),
+    Route('PUT', '/v1/user/bookings/<int:booking_id>/confirm', '/v1/user/bookings/23/confirm', 6, role='member'),
+    Route('PUT', '/v1/user/bookings/<int:booking_id>/decline', '/v1/user/bookings/25/decline', 6, role='member'),
+
+    Route('GET', '/metrics', '/metrics', 0, role='scraper'),
+]
+
+
+def request_route(client, route: Route, seed, headers):
+    dates = {'start': seed.now - timedelta(days=1), 'end': seed.now + timedelta(days=3),
+             'future': seed.now + timedelta(days=30)}
+    json = {key: value.format(**dates) if isinstance(value, str) else value
+            for key, value in route.json.items()} if route.json is not None else None
+    response = client.open(route.path.format(**dates), method=route.method, json=json, headers=headers)
+    response.get_data()
+    return response
+
+
+@pytest.fixture
+def headers_for(admin_headers, member_headers):
+    return {'admin': admin_headers, 'member': member_headers, 'scraper': METRICS_HEADERS, None: {}}
+
+
+@pytest.mark.parametrize('route', ROUTES, ids=[f'{route.method} {route.rule}' for route in ROUTES])
+def test_route_within_query_budget(route, client, seed, headers_for, count_queries):
+    with count_queries() as counter:
+        response = request_route(client, route, seed, headers_for[route.role])
+    assert response.status_code == route.status, response.get_data(as_text=True)
+    counter.assert_within(route.budget)
+
+
+def test_every_route_has_a_budget(app):
+    routes = set()
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint == 'static':
+            continue
+        methods = rule.methods - {'HEAD'}
+        routes.update((method, rule.rule) for method in (methods - {'OPTIONS'} or methods))
+    assert routes == {(route.method, route.rule) for route in ROUTES}
+
+
+LISTINGS = [route for route in ROUTES if route.method == 'GET' and route.rule in (
+    '/v1/bookings', '/v1/users', '/v1/users/search', '/v1/rooms', '/v1/status_rooms',
+    '/v1/bookings/search_users', '/v1/bookings/search_room/<int:room_id>', '/v1/admin/view_booking_pending',
+    '/v1/user/bookings', '/v1/user/view_booked', '/v1/user/view_list_invite')]
+
+
+@pytest.mark.parametrize('route', LISTINGS, ids=[route.rule for route in LISTINGS])
+def test_listing_queries_do_not_grow_with_rows(route, client, seed, headers_for, count_queries):
+    clear_caches()
+    with count_queries() as before:
+        request_route(client, route, seed, headers_for[route.role])
+
+    users = User.query.order_by(User.user_id).all()
+    for booking in Booking.query.order_by(Booking.booking_id).all():
+        copy = Booking(title=booking.title, time_start=booking.time_start, time_end=booking.time_end,
+                       is_accepted=booking.is_accepted, is_deleted=False, room_id=booking.room_id,
+                       creator_id=booking.creator_id)
+        db.session.add(copy)
+        db.session.flush()
+        db.session.add_all(BookingUser(booking_id=copy.booking_id, user_id=user.user_id, is_attending=None)
+                           for user in users)
+    db.session.commit()
+    clear_caches()
+
+    with count_queries() as after:
+        request_route(client, route, seed, headers_for[route.role])
+    assert after.count == before.count, after.report(before.count)
+
+
+@query_budget(8)
+def test_inviting_every_user_is_batched(client, seed, admin_headers):
+    route = next(route for route in ROUTES if route.method == 'POST' and route.rule == '/v1/bookings')
+    route = route._replace(json=dict(route.json, user_ids=seed.user_ids))
+    assert request_route(client, route, seed, admin_headers).status_code == 200
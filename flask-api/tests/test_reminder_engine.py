@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+import pytest
+from project import db
+from project.models import Booking, BookingUser, NotificationOutbox, ReminderSentLog
+from project.services.reminder_engine import ReminderEngine
+
+
+def add_booking(seed, minutes_ahead: int) -> Booking:
+    time_start = datetime.now().replace(microsecond=0) + timedelta(minutes=minutes_ahead)
+    booking = Booking(title='Standup', time_start=time_start, time_end=time_start + timedelta(minutes=15),
+                      is_accepted=True, is_deleted=False, room_id=seed.room_ids[0], creator_id=seed.admin_id)
+    db.session.add(booking)
+    db.session.flush()
+    db.session.add(BookingUser(booking_id=booking.booking_id, user_id=seed.member_id))
+    db.session.commit()
+    return booking
+
+
+def remove_booking(booking: Booking) -> None:
+    ReminderSentLog.query.filter_by(booking_id=booking.booking_id).delete()
+    BookingUser.query.filter_by(booking_id=booking.booking_id).delete()
+    db.session.delete(booking)
+    db.session.commit()
+
+
+@pytest.fixture
+def soon(seed):
+    booking = add_booking(seed, 5)
+    ReminderEngine._loaded_until = None
+    yield booking
+    remove_booking(booking)
+
+
+@pytest.fixture
+def later(seed):
+    booking = add_booking(seed, 20)
+    ReminderEngine._loaded_until = None
+    yield booking
+    remove_booking(booking)
+
+
+def sent(booking):
+    return ReminderSentLog.query.filter_by(booking_id=booking.booking_id).count()
+
+
+def reload_and_tick():
+    ReminderEngine._refreshed_at = 0.0
+    ReminderEngine.tick()
+
+
+def test_window_reload_does_not_resend(soon, monkeypatch):
+    ReminderEngine.tick()
+    assert sent(soon) == 1
+    sends = []
+    monkeypatch.setattr(ReminderEngine, 'send', staticmethod(sends.append))
+
+    reload_and_tick()
+
+    assert sends == []
+    assert (soon.booking_id, 10) not in ReminderEngine._scheduled
+
+
+def test_rescheduled_booking_is_reminded_again(soon):
+    ReminderEngine.tick()
+    soon.time_start += timedelta(minutes=3)
+    soon.time_end += timedelta(minutes=3)
+    db.session.commit()
+    outbox = NotificationOutbox.query.count()
+
+    reload_and_tick()
+
+    assert sent(soon) == 2
+    assert NotificationOutbox.query.count() > outbox
+
+
+def test_cancelled_booking_leaves_the_heap_at_commit(later):
+    ReminderEngine.tick()
+    assert (later.booking_id, 10) in ReminderEngine._scheduled
+
+    later.is_deleted = True
+    db.session.commit()
+
+    assert (later.booking_id, 10) not in ReminderEngine._scheduled
+
+
+def test_booking_moved_earlier_fires_without_a_reload(later):
+    ReminderEngine.tick()
+    later.time_start -= timedelta(minutes=15)
+    later.time_end -= timedelta(minutes=15)
+    db.session.commit()
+
+    ReminderEngine.tick()
+
+    assert sent(later) == 1
+
+
+def test_edit_after_sending_does_not_queue_the_lead_again(soon):
+    ReminderEngine.tick()
+    assert sent(soon) == 1
+
+    soon.title = 'Renamed standup'
+    db.session.commit()
+
+    assert (soon.booking_id, 10) not in ReminderEngine._scheduled
@@ -0,0 +1,134 @@
+import shutil
+import sqlite3
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from project import create_app, db, scheduler
+from project.cache.count_cache import CountCache
+from project.database.routing import STICKY_COOKIE, ReplicaRouter
+from project.testing import clear_caches
+from tests.conftest import Config, _auth_headers, seed_database
+
+
+@pytest.fixture(scope='module')
+def routed(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('replicas')
+
+    class ReplicaConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{directory}/primary.db'
+        SQLALCHEMY_REPLICA_URIS = [f'sqlite:///{directory}/replica.db']
+
+    scheduled_app = scheduler.app
+    routed = create_app(ReplicaConfig)
+    routed.primary, routed.replica = directory / 'primary.db', directory / 'replica.db'
+    yield routed
+    scheduler.app = scheduled_app
+
+
+@pytest.fixture
+def replicated(routed):
+    """A primary and a replica that is a copy of it, with every room renamed on the replica only."""
+    with routed.app_context():
+        db.drop_all()
+        db.create_all()
+        seeded = seed_database()
+        admin, member = _auth_headers(seeded.admin_id), _auth_headers(seeded.member_id)
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    shutil.copy(routed.primary, routed.replica)
+    with sqlite3.connect(routed.replica) as connection:
+        connection.execute("UPDATE room SET room_name = 'Replica ' || room_name")
+    clear_caches()
+    # no app context is held here, so every request gets its own session, as in production
+    yield SimpleNamespace(client=routed.test_client(), admin=admin, member=member, seed=seeded)
+    clear_caches()
+
+
+def room_names(replicated, headers, path='/v1/rooms'):
+    response = replicated.client.get(path, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return {room['room_name'] for room in response.get_json()['data']['rooms']}
+
+
+def read_from_replica(replicated, headers, path='/v1/rooms'):
+    return all(name.startswith('Replica ') for name in room_names(replicated, headers, path))
+
+
+def book(replicated, headers, day=15):
+    response = replicated.client.post('/v1/user/bookings', headers=headers, json={
+        'room_id': replicated.seed.room_ids[0], 'title': 'Replicated',
+        'time_start': f'{replicated.seed.now.year + 1}-03-{day} 10:00:00',
+        'time_end': f'{replicated.seed.now.year + 1}-03-{day} 11:00:00', 'user_ids': [replicated.seed.admin_id]})
+    assert response.status_code == 200, response.get_json()
+
+
+def titles(path):
+    with sqlite3.connect(path) as connection:
+        return [row[0] for row in connection.execute("SELECT title FROM booking WHERE title = 'Replicated'")]
+
+
+def test_reads_go_to_the_replica_and_writes_to_the_primary(replicated, routed):
+    assert read_from_replica(replicated, replicated.member)
+
+    book(replicated, replicated.member)
+
+    assert (titles(routed.primary), titles(routed.replica)) == (['Replicated'], [])
+
+
+def test_writer_reads_from_the_primary_until_the_sticky_window_ends(replicated):
+    book(replicated, replicated.member)
+
+    assert not read_from_replica(replicated, replicated.member)
+    assert read_from_replica(replicated, replicated.admin)
+    ReplicaRouter._recent_writers.clear()
+    replicated.client.delete_cookie(STICKY_COOKIE)
+    assert read_from_replica(replicated, replicated.member)
+
+
+def test_writer_stays_on_the_primary_in_another_worker(replicated, routed):
+    book(replicated, replicated.member)
+    # a fresh router, as in a worker that did not serve the write
+    ReplicaRouter.clear()
+
+    assert not read_from_replica(replicated, replicated.member)
+    assert read_from_replica(replicated, replicated.admin)
+    # the cookie is what keeps the writer sticky; a client without it reads from the replica
+    assert read_from_replica(SimpleNamespace(client=routed.test_client()), replicated.member)
+
+
+def test_unreachable_replica_is_skipped(replicated, routed):
+    with routed.app_context():
+        replica = db.engines['replica_0']
+    replica.dispose()
+
+    def refuse(dialect, conn_rec, cargs, cparams):
+        raise sqlite3.OperationalError('unable to open database file')
+    event.listen(replica, 'do_connect', refuse)
+    try:
+        # the request that finds the replica down fails; the ones after it read from the primary
+        with pytest.raises(OperationalError):
+            replicated.client.get('/v1/rooms', headers=replicated.member)
+        assert not read_from_replica(replicated, replicated.member)
+        assert not read_from_replica(replicated, replicated.admin)
+    finally:
+        event.remove(replica, 'do_connect', refuse)
+
+    ReplicaRouter._unavailable.clear()
+    assert read_from_replica(replicated, replicated.admin)
+
+
+def test_shared_caches_refill_from_the_primary_after_a_write(replicated):
+    assert read_from_replica(replicated, replicated.admin, '/v1/status_rooms')
+    pending = '/v1/admin/view_booking_pending?cursor=&with_count=true'
+    replica_total = replicated.client.get(pending, headers=replicated.admin).get_json()['data']['total_items']
+
+    book(replicated, replicated.member)
+    CountCache._cache.clear()
+
+    # the admin is not sticky, but the commit emptied the room status cache
+    assert not read_from_replica(replicated, replicated.admin, '/v1/status_rooms')
+    assert replicated.client.get(pending, headers=replicated.admin).get_json()['data']['total_items'] == \
+        replica_total + 1
+    assert read_from_replica(replicated, replicated.admin)
@@ -0,0 +1,42 @@
+import pytest
+from project import db
+from project.models import Booking, Room
+from project.testing import clear_caches
+
+
+@pytest.mark.parametrize('page, per_page, rooms', [(1, 10, 6), (1, 4, 4), (2, 4, 2), (3, 2, 2), (4, 2, 0), (9, 4, 0)])
+def test_status_rooms_totals_without_window_functions(page, per_page, rooms, client, seed, admin_headers,
+                                                      count_queries):
+    clear_caches()
+    with count_queries() as counter:
+        response = client.get(f'/v1/status_rooms?page={page}&per_page={per_page}', headers=admin_headers)
+
+    data = response.get_json()['data']
+    assert len(data['rooms']) == rooms
+    assert (data['total_items'], data['total_pages']) == (6, -(-6 // per_page))
+    assert not [statement for statement in counter.statements if ' OVER ' in statement.upper()]
+
+
+def test_status_keeps_the_block_flag_apart_from_busy(client, seed, admin_headers):
+    response = client.get('/v1/status_rooms?per_page=10', headers=admin_headers)
+
+    rooms = {room['room_id']: room for room in response.get_json()['data']['rooms']}
+    busy_room_id = db.session.get(Booking, seed.booking_ids[10]).room_id
+    assert (rooms[busy_room_id]['is_busy'], rooms[busy_room_id]['is_blocked']) == (True, False)
+    assert rooms[busy_room_id]['description'] == 'BUSY'
+    assert (rooms[seed.blocked_room_id]['is_busy'], rooms[seed.blocked_room_id]['is_blocked']) == (False, True)
+    assert db.session.get(Room, busy_room_id).is_blocked is False
+
+
+def test_delete_booking_checks_the_block_flag_not_busy(client, seed, admin_headers):
+    running = db.session.get(Booking, seed.booking_ids[10])
+    later = Booking.query.filter(Booking.room_id != running.room_id, Booking.time_start > seed.now).first()
+    db.session.get(Room, later.room_id).is_blocked = True
+    db.session.commit()
+    running_id, later_id = running.booking_id, later.booking_id
+    assert client.get('/v1/status_rooms', headers=admin_headers).status_code == 200
+
+    assert client.delete(f'/v1/bookings/{running_id}', headers=admin_headers).status_code == 200
+    response = client.delete(f'/v1/bookings/{later_id}', headers=admin_headers)
+    assert response.status_code == 400
+    assert 'currently in use' in response.get_json()['errors']
@@ -0,0 +1,12 @@
+from project import db
+from project.models import Room
+
+
+def test_room_rename_is_committed(client, seed, admin_headers):
+    room_id = seed.room_ids[1]
+
+    response = client.put(f'/v1/rooms/{room_id}', json={'room_name': 'Room renamed'}, headers=admin_headers)
+
+    assert response.status_code == 200, response.get_json()
+    db.session.rollback()
+    assert db.session.get(Room, room_id).room_name == 'Room renamed'
@@ -0,0 +1,47 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import func, select
+from project import db
+from project.database.excute.scheduler_lease import SchedulerLeaseExecutor, seconds_from_now
+from project.models import SchedulerLease
+
+
+@pytest.fixture
+def lease(seed):
+    yield 'test-lease'
+    SchedulerLease.query.filter_by(name='test-lease').delete()
+    db.session.commit()
+
+
+def set_expiry(name, seconds):
+    SchedulerLease.query.filter_by(name=name).update({'expires_at': seconds_from_now(seconds)})
+    db.session.commit()
+
+
+def test_live_lease_is_only_renewed_by_its_owner(lease):
+    assert SchedulerLeaseExecutor.try_acquire(lease, 'a', 30)
+    assert not SchedulerLeaseExecutor.try_acquire(lease, 'b', 30)
+    assert SchedulerLeaseExecutor.try_acquire(lease, 'a', 30)
+
+
+def test_lease_expired_on_the_database_clock_is_taken_over(lease):
+    assert SchedulerLeaseExecutor.try_acquire(lease, 'a', 30)
+    set_expiry(lease, -5)
+
+    assert SchedulerLeaseExecutor.try_acquire(lease, 'b', 30)
+    assert db.session.get(SchedulerLease, lease).owner == 'b'
+
+
+def test_released_lease_is_free_at_once(lease):
+    assert SchedulerLeaseExecutor.try_acquire(lease, 'a', 30)
+    SchedulerLeaseExecutor.release(lease, 'a')
+
+    assert SchedulerLeaseExecutor.try_acquire(lease, 'b', 30)
+
+
+def test_expiry_is_set_from_the_database_clock(lease):
+    assert SchedulerLeaseExecutor.try_acquire(lease, 'a', 30)
+
+    expires_at, db_now = db.session.execute(
+        select(SchedulerLease.expires_at, func.now()).where(SchedulerLease.name == lease)).one()
+    assert 25 <= (expires_at - datetime.fromisoformat(str(db_now))).total_seconds() <= 30
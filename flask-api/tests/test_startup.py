@@ -0,0 +1,81 @@
+"""Boot checks for the application factory, each in a fresh interpreter.
+
+Boot may only register things: the checks assert that importing the project and
+calling create_app() opens no database connection, starts no scheduler or
+thread, and builds none of the FCM, SMTP or Celery clients.
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BOOT = '''
+import os
+import threading
+from project import create_app, scheduler
+from project.database.pool import PoolMetrics
+from project.services.mail_transport import MailTransport
+from project.services.notification_service import PushNotification
+from project.services.task_dispatcher import TaskDispatcher
+
+create_app()
+assert not os.path.exists(os.environ['STARTUP_DB_PATH']), 'database opened during boot'
+assert PoolMetrics.snapshot()['connects'] == 0, 'database connection opened during boot'
+assert not scheduler.running, 'scheduler started during boot'
+assert threading.active_count() == 1, [thread.name for thread in threading.enumerate()]
+assert PushNotification._push_service is None, 'FCM client built during boot'
+assert TaskDispatcher._executor is None, 'task executor started during boot'
+assert MailTransport._idle == [], 'SMTP connection opened during boot'
+'''
+
+CUSTOM_CONFIG = '''
+from flask import current_app
+from project import create_app, scheduler
+from project.cache.count_cache import CountCache
+from project.cache.permission_cache import PermissionCache
+from project.config import BaseConfig
+from project.services.reminder_engine import ReminderEngine
+from project.services.task_dispatcher import TaskDispatcher
+
+class Config(BaseConfig):
+    DEBUG = False
+    COUNT_CACHE_SIZE = 7
+    PERMISSION_CACHE_TTL = 11
+    REMINDER_LEAD_MINUTES = [45]
+    OUTBOX_POLL_SECONDS = 13
+    CELERY_BROKER_URL = 'memory://'
+
+app = create_app(Config)
+assert not app.debug
+with app.app_context():
+    assert current_app.config['COUNT_CACHE_SIZE'] == 7
+    assert (CountCache._cache.maxsize, PermissionCache._permissions.ttl) == (7, 11)
+    assert ReminderEngine.lead_minutes() == [45]
+    assert scheduler.get_job('outbox_drain').trigger.interval.total_seconds() == 13
+    assert current_app.config['CELERY_BROKER_URL'] == 'memory://'
+    assert TaskDispatcher.dispatch(type('Task', (), {'delay': staticmethod(lambda: 'queued')})) == 'queued'
+'''
+
+
+def run_boot(code: str, db_path: str) -> str:
+    env = {
+        'PATH': os.environ.get('PATH', ''),
+        'HOME': os.environ.get('HOME', ''),
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'STARTUP_DB_PATH': db_path,
+        'JWT_SECRET_KEY': 'startup-check',
+        'CELERY_BROKER_URL': '',
+        'SCHEDULER_AUTOSTART': 'false',
+    }
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_boot_does_no_work(tmp_path):
+    run_boot(BOOT, str(tmp_path / 'app.db'))
+
+
+def test_create_app_applies_the_given_config(tmp_path):
+    run_boot(CUSTOM_CONFIG, str(tmp_path / 'app.db'))